@@ -0,0 +1,44 @@
+"""Time the related-games index build at scale.
+
+    python benchmarks/bench_related.py [cart_items] [games] [items_per_cart]
+
+Generates synthetic (cart_id, game_id) pairs with Zipf-distributed game
+popularity and times the sparse co-occurrence product and the top-k pass
+separately, plus one incremental-style delta over 1% of the carts.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recommendations import cooccurrence, top_k
+
+def synthetic_items(n_items, n_games, items_per_cart, seed=0):
+    rng = np.random.default_rng(seed)
+    cart_ids = np.repeat(np.arange(n_items // items_per_cart + 1), items_per_cart)[:n_items]
+    game_ids = (rng.zipf(1.3, n_items) - 1) % n_games + 1
+    return cart_ids, game_ids
+
+def timed(label, f):
+    started = time.perf_counter()
+    result = f()
+    print(f'{label:<28}{time.perf_counter() - started:>8.3f} s')
+    return result
+
+def main(n_items, n_games, items_per_cart):
+    cart_ids, game_ids = synthetic_items(n_items, n_games, items_per_cart)
+    print(f'{n_items} cart items, {len(np.unique(cart_ids))} carts, {len(np.unique(game_ids))} games')
+
+    games, counts = timed('co-occurrence (X.T @ X)', lambda: cooccurrence(cart_ids, game_ids))
+    print(f'{"non-zero pairs":<28}{counts.nnz:>10}')
+    timed('top-k per game (k=10)', lambda: top_k(games, counts, 10))
+
+    affected = np.isin(cart_ids, np.unique(cart_ids)[::100])
+    timed('delta for 1% of carts', lambda: cooccurrence(cart_ids[affected], game_ids[affected], games))
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    defaults = [1000000, 20000, 4]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,70 @@
+"""Compare hot-game purchase throughput with and without sharded stock.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_stock.py [threads] [buckets] [seconds]
+
+Every thread buys one unit of the same game in its own transaction, as fast
+as it can, first against the single `games.stock` row and then with the
+stock split over `buckets` shards. Reports purchases per second for each.
+The row-lock contention this targets only exists on a database with row
+locks; SQLite serializes all writers, so run it against Postgres.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from config import Config
+from models import db, Game
+from services.stock import shard_stock, unshard_stock, decrement_stock
+
+def run(app, game_id, n_threads, seconds):
+    stop = threading.Event()
+    counts = [0] * n_threads
+
+    def buyer(slot):
+        with app.app_context():
+            while not stop.is_set():
+                if decrement_stock(game_id, 1):
+                    db.session.commit()
+                    counts[slot] += 1
+                else:
+                    db.session.rollback()
+
+    threads = [threading.Thread(target=buyer, args=(slot,)) for slot in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+def main(n_threads, buckets, seconds):
+    config = type('BenchConfig', (Config,), {
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': n_threads, 'max_overflow': 0},
+        'RELATED_REFRESH_INTERVAL': 0, 'STATS_FLUSH_INTERVAL': 0, 'SUGGEST_REFRESH_INTERVAL': 0,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        game = Game(title='Flash Sale Game', price=59.99, stock=10 ** 9)
+        db.session.add(game)
+        db.session.commit()
+        game_id = game.id
+
+        try:
+            print(f'{n_threads} threads, single row: {run(app, game_id, n_threads, seconds):10.0f} purchases/s')
+            shard_stock(game_id, buckets)
+            db.session.commit()
+            print(f'{n_threads} threads, {buckets} shards: {run(app, game_id, n_threads, seconds):10.0f} purchases/s')
+        finally:
+            unshard_stock(game_id)
+            db.session.delete(db.session.get(Game, game_id))
+            db.session.commit()
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [32, 16, 10][len(args):]))
@@ -0,0 +1,50 @@
+"""Time typeahead lookups against a large title index.
+
+    python benchmarks/bench_suggest.py [games]
+
+Loads synthetic titles into an in-memory SQLite catalog, builds the title
+index and reports build time, key count and per-lookup latency for prefixes
+of one to six characters.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from config import TestingConfig
+from models import db, Game
+
+WORDS = ['dark', 'souls', 'legend', 'witcher', 'hunt', 'star', 'wars', 'portal', 'knight',
+         'hollow', 'final', 'fantasy', 'super', 'mario', 'city', 'racing', 'tactics',
+         'dragon', 'quest', 'zero', 'dawn', 'ghost', 'island', 'empire', 'chronicles']
+
+def main(n_games):
+    rng = random.Random(0)
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Game.__table__.insert(), [
+            {'title': ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 5))) + f' {i}',
+             'price': 9.99, 'stock': 1}
+            for i in range(n_games)
+        ])
+        db.session.commit()
+
+        index = app.extensions['title_index']
+        started = time.perf_counter()
+        index.build()
+        print(f'{n_games} games, {len(index._keys)} keys, built in {time.perf_counter() - started:.2f} s')
+
+        for length in range(1, 7):
+            prefixes = [rng.choice(WORDS)[:length] for _ in range(10000)]
+            started = time.perf_counter()
+            for prefix in prefixes:
+                index.suggest(prefix, 10)
+            per_lookup = (time.perf_counter() - started) / len(prefixes)
+            print(f'prefix length {length}: {per_lookup * 1e6:8.1f} us per lookup')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -0,0 +1,39 @@
+"""Compare request body parsing paths.
+
+    python benchmarks/bench_validation.py [iterations]
+
+`dict path` is what the views used to do: json.loads into a dict (as
+request.get_json() does) and then Model(**data). `raw path` is what
+@validate_body does: one TypeAdapter.validate_json call on the raw bytes.
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import GameCreate, UserCreate, CartItemCreate
+from routes.validation import type_adapter
+
+BODIES = {
+    UserCreate: {"email": "test@example.com", "username": "testuser", "password": "password123"},
+    GameCreate: {"title": "New Game", "description": "A new game " * 20, "price": 29.99,
+                 "image_url": "https://example.com/cover.png", "stock": 10},
+    CartItemCreate: {"game_id": 42, "quantity": 3},
+}
+
+def main(iterations):
+    print(f"{'model':<16}{'dict path':>14}{'raw path':>14}{'speedup':>10}")
+    for model, body in BODIES.items():
+        raw = json.dumps(body).encode()
+        adapter = type_adapter(model)
+        dict_path = timeit.timeit(lambda: model(**json.loads(raw)), number=iterations)
+        raw_path = timeit.timeit(lambda: adapter.validate_json(raw), number=iterations)
+        print(f"{model.__name__:<16}"
+              f"{dict_path / iterations * 1e6:>11.2f} us"
+              f"{raw_path / iterations * 1e6:>11.2f} us"
+              f"{dict_path / raw_path:>9.2f}x")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
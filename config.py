@@ -0,0 +1,120 @@
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # Database configuration
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///games.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica used by read-only views (see services/db_routing.py)
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
+
+    # JWT configuration
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', SECRET_KEY)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # CORS configuration
+    CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173')
+
+    # Uploaded game images (defaults to <instance>/images)
+    IMAGE_STORAGE_DIR = os.getenv('IMAGE_STORAGE_DIR')
+    IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', 5 * 1024 * 1024))
+    # Width x height limit, since decoding cost follows pixels, not file size
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))
+    # Request bodies larger than this are refused with 413 before they are
+    # read; leaves room for the multipart framing around an image upload
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', IMAGE_MAX_BYTES + 64 * 1024))
+    IMAGE_CACHE_MAX_AGE = 365 * 24 * 3600
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+    THUMBNAIL_SIZES = {'thumb': (200, 200), 'medium': (600, 600)}
+
+    # Cart backend: 'db' writes every edit through, 'write_behind' keeps active
+    # carts in memory and flushes them in batches (see services/cart_store.py)
+    CART_BACKEND = os.getenv('CART_BACKEND', 'db')
+    CART_FLUSH_INTERVAL = float(os.getenv('CART_FLUSH_INTERVAL', '2'))
+    CART_JOURNAL_PATH = os.getenv('CART_JOURNAL_PATH')
+    CART_JOURNAL_FSYNC = os.getenv('CART_JOURNAL_FSYNC', '0') == '1'
+    # Clean carts untouched for this many seconds are dropped from memory
+    CART_IDLE_TTL = int(os.getenv('CART_IDLE_TTL', '900'))
+
+    # Background jobs (see services/jobs.py). Run them in the web process with
+    # JOBS_IN_PROCESS=1, or in a separate process with `flask worker`.
+    JOBS_IN_PROCESS = os.getenv('JOBS_IN_PROCESS', '0') == '1'
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', '2'))
+    JOB_RETRY_MAX_DELAY = float(os.getenv('JOB_RETRY_MAX_DELAY', '300'))
+    JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', '600'))
+
+    # Precomputed catalog snapshots (see services/snapshots.py)
+    SNAPSHOTS_ENABLED = os.getenv('SNAPSHOTS_ENABLED', '0') == '1'
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR')
+    SNAPSHOT_PAGES = int(os.getenv('SNAPSHOT_PAGES', '5'))
+    SNAPSHOT_PAGE_SIZE = int(os.getenv('SNAPSHOT_PAGE_SIZE', '10'))
+
+    # Database maintenance (see services/maintenance.py)
+    CART_RETENTION_DAYS = int(os.getenv('CART_RETENTION_DAYS', '30'))
+    JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', '7'))
+    MAINTENANCE_BATCH_SIZE = int(os.getenv('MAINTENANCE_BATCH_SIZE', '500'))
+    MAINTENANCE_BATCH_PAUSE = float(os.getenv('MAINTENANCE_BATCH_PAUSE', '0.05'))
+    MAINTENANCE_INTERVAL = int(os.getenv('MAINTENANCE_INTERVAL', str(24 * 3600)))
+
+    # "Frequently bought together" index (see services/recommendations.py)
+    RELATED_TOP_K = int(os.getenv('RELATED_TOP_K', '10'))
+    RELATED_REFRESH_INTERVAL = int(os.getenv('RELATED_REFRESH_INTERVAL', '300'))
+    RELATED_FULL_REBUILD_INTERVAL = int(os.getenv('RELATED_FULL_REBUILD_INTERVAL', str(24 * 3600)))
+
+    # Popularity counters are flushed to game_stats every STATS_FLUSH_INTERVAL seconds
+    STATS_FLUSH_INTERVAL = float(os.getenv('STATS_FLUSH_INTERVAL', '5'))
+
+    # Typeahead title index: bounded key count, rebuilt from the database periodically
+    SUGGEST_MAX_KEYS = int(os.getenv('SUGGEST_MAX_KEYS', '2000000'))
+    SUGGEST_WORDS_PER_TITLE = int(os.getenv('SUGGEST_WORDS_PER_TITLE', '4'))
+    SUGGEST_REFRESH_INTERVAL = int(os.getenv('SUGGEST_REFRESH_INTERVAL', '600'))
+
+    # Idempotency-Key responses are kept for IDEMPOTENCY_TTL seconds; a retry that
+    # arrives while the first request runs waits up to IDEMPOTENCY_WAIT seconds.
+    # A request that has not stored its response after IDEMPOTENCY_LOCK_TIMEOUT
+    # seconds is presumed dead and its key can be claimed again; keep it above
+    # the worker timeout
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))
+    IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT', '5'))
+    IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
+
+    # Request phase tracing (see services/tracing.py)
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', '0') == '1'
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+    TRACE_SLOW_THRESHOLD = float(os.getenv('TRACE_SLOW_THRESHOLD', '1.0'))
+    TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH')
+    TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'game-store-api')
+
+    # Threads rendering the catalog part of GET /api/bootstrap; 0 renders inline
+    BOOTSTRAP_WORKERS = int(os.getenv('BOOTSTRAP_WORKERS', '4'))
+
+    # Most sub-requests accepted by one POST /batch
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+
+    # Flask-Migrate pulls in Alembic, which only the `flask db` commands need;
+    # run them as `ENABLE_MIGRATIONS=1 flask db ...`
+    ENABLE_MIGRATIONS = os.getenv('ENABLE_MIGRATIONS', '0') == '1'
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_BINDS = {}
+    SECRET_KEY = 'test-secret-key'
+    JWT_SECRET_KEY = 'test-jwt-secret-key'
+    ENABLE_MIGRATIONS = False
+    JOBS_IN_PROCESS = False
+    MAINTENANCE_BATCH_PAUSE = 0
+    RELATED_REFRESH_INTERVAL = 0
+    STATS_FLUSH_INTERVAL = 0
+    SUGGEST_REFRESH_INTERVAL = 0
+    # In-memory SQLite shares one connection, which must not be used from two threads at once
+    BOOTSTRAP_WORKERS = 0
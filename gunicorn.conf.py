@@ -0,0 +1,21 @@
+import os
+
+# Gunicorn settings. Run with:  gunicorn -c gunicorn.conf.py
+wsgi_app = 'app:create_app()'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+
+# Import and build the app once in the master so workers fork from a warmed
+# parent instead of each paying the import cost.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes.
+    if not preload_app:
+        return
+    from models import db
+    app = server.app.wsgi()
+    with app.app_context():
+        # The default engine and every bind (e.g. the read replica)
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,13 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, List, Optional
 from werkzeug.security import generate_password_hash, check_password_hash
-import jwt
 from functools import wraps
 from flask import current_app, request, jsonify
+from services.images import thumbnail_urls
+from services.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -44,10 +46,43 @@ class Game(db.Model):
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(512), nullable=True)
-    stock = db.Column(db.Integer, nullable=False)
+    image_key = db.Column(db.String(64), nullable=True)  # content hash of an uploaded image
+    stock_count = db.Column('stock', db.Integer, nullable=False)
+    stock_buckets = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # > 0: stock lives in stock_shards
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+
+    stock_shards = db.relationship('StockShard', cascade='all, delete-orphan')
+
+    @hybrid_property
+    def stock(self):
+        """Units in stock: the games.stock column, or the sum of the shards for sharded games"""
+        if not self.stock_buckets:
+            return self.stock_count
+        return db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(StockShard.count), 0))
+            .where(StockShard.game_id == self.id)
+        ).scalar()
+
+    @stock.setter
+    def stock(self, value):
+        if not self.stock_buckets:
+            self.stock_count = value
+            return
+        # Spread the new total evenly over the existing shards
+        base, extra = divmod(value, self.stock_buckets)
+        db.session.execute(
+            db.update(StockShard).where(StockShard.game_id == self.id).values(
+                count=base + db.case((StockShard.bucket < extra, 1), else_=0)
+            )
+        )
+
+    @stock.expression
+    def stock(cls):
+        shard_total = (db.select(db.func.coalesce(db.func.sum(StockShard.count), 0))
+                       .where(StockShard.game_id == cls.id).scalar_subquery())
+        return db.case((cls.stock_buckets > 0, shard_total), else_=cls.stock_count)
     
     def to_dict(self):
         return {
@@ -56,17 +91,25 @@ class Game(db.Model):
             'description': self.description,
             'price': self.price,
             'image_url': self.image_url,
+            'thumbnails': thumbnail_urls(self.image_key, current_app.config['THUMBNAIL_SIZES']) if self.image_key else None,
             'stock': self.stock,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
 
+class StockShard(db.Model):
+    __tablename__ = 'stock_shards'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False)
-    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False, index=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -85,9 +128,9 @@ class Cart(db.Model):
     __tablename__ = 'carts'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), index=True)
     
     user = db.relationship('User', backref='cart')
     items = db.relationship('CartItem', backref='cart', cascade='all, delete-orphan')
@@ -102,9 +145,73 @@ class Cart(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+class GameStats(db.Model):
+    __tablename__ = 'game_stats'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id', ondelete='CASCADE'), primary_key=True)
+    carts_containing = db.Column(db.Integer, nullable=False, default=0, index=True)
+    units_in_carts = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0, index=True)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    game = db.relationship('Game', backref=db.backref('stats', uselist=False,
+                                                      cascade='all, delete-orphan'))
+
+    def to_dict(self):
+        return {
+            'game_id': self.game_id,
+            'title': self.game.title if self.game else None,
+            'carts_containing': self.carts_containing,
+            'units_in_carts': self.units_in_carts,
+            'units_sold': self.units_sold
+        }
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    last_error = db.Column(db.Text, nullable=True)
+    run_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'run_at': self.run_at.isoformat(),
+            'created_at': self.created_at.isoformat()
+        }
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (db.UniqueConstraint('user_id', 'key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status_code = db.Column(db.Integer, nullable=True)      # None while the first request runs
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    claimed_at = db.Column(db.DateTime, nullable=False)     # start of the in-progress lease
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 # Pydantic Models
 class UserCreate(BaseModel):
-    email: str = Field(..., regex=r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+    email: str = Field(..., pattern=r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
     username: str = Field(..., min_length=3, max_length=80)
     password: str = Field(..., min_length=8)
     role: Optional[str] = Field(default='user', pattern='^(admin|user)$')
@@ -155,9 +262,27 @@ class CartItemCreate(BaseModel):
     quantity: int = Field(..., gt=0)
 
 class CartItemUpdate(BaseModel):
+    game_id: int = Field(..., gt=0)
     quantity: int = Field(..., gt=0)
 
-# Legacy token decorators - will be replaced by Flask-JWT-Extended
+class CartMerge(BaseModel):
+    items: List[CartItemCreate] = Field(..., min_length=1, max_length=100)
+
+class StockShardsUpdate(BaseModel):
+    buckets: int = Field(..., ge=2, le=256)
+
+# Pydantic Models for POST /batch
+class BatchSubRequest(BaseModel):
+    method: str = Field(..., pattern='^(GET|POST|PUT|PATCH|DELETE)$')
+    path: str = Field(..., pattern='^/')
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1)
+    transaction: bool = False
+
+# Legacy token decorators - will be replaced by Flask-JWT-Extended.
+# PyJWT is imported on first use so importing the models stays cheap.
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -169,6 +294,7 @@ def token_required(f):
             return jsonify({'error': 'Token is missing'}), 401
             
         try:
+            import jwt
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
             current_user = User.query.get(data['user_id'])
         except:
@@ -188,6 +314,7 @@ def admin_required(f):
             return jsonify({'error': 'Token is missing'}), 401
             
         try:
+            import jwt
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
             current_user = User.query.get(data['user_id'])
             if current_user.role != 'admin':
@@ -0,0 +1,8 @@
+from routes.auth import auth_bp
+from routes.games import games_bp
+from routes.cart import cart_bp
+from routes.admin import admin_bp
+from routes.bootstrap import bootstrap_bp
+from routes.batch import batch_bp
+
+__all__ = ['auth_bp', 'games_bp', 'cart_bp', 'admin_bp', 'bootstrap_bp', 'batch_bp']
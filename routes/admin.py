@@ -0,0 +1,87 @@
+from flask import Blueprint, request, jsonify, current_app
+from models import db, User, StockShardsUpdate
+from flask_jwt_extended import get_jwt_identity
+from routes.validation import validate_body
+from services.stock import shard_stock, unshard_stock
+from routes.auth_utils import jwt_required
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/jobs/stats', methods=['GET'])
+@jwt_required()
+def get_job_stats():
+    """Get background job queue depth and latency (admin only)"""
+    # Check if user is admin
+    claims = get_jwt_identity()
+    user = User.query.get(claims)
+
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin privileges required'}), 403
+
+    return jsonify(current_app.extensions['job_queue'].stats())
+
+@admin_bp.route('/admin/analytics', methods=['GET'])
+@jwt_required()
+def get_analytics():
+    """Get best-selling and most carted games (admin only)"""
+    # Check if user is admin
+    claims = get_jwt_identity()
+    user = User.query.get(claims)
+
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin privileges required'}), 403
+
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    counters = current_app.extensions['game_counters']
+
+    return jsonify({
+        'best_sellers': [stats.to_dict() for stats in counters.top('units_sold', limit)],
+        'most_carted': [stats.to_dict() for stats in counters.top('carts_containing', limit)]
+    })
+
+@admin_bp.route('/admin/games/<int:game_id>/stock-shards', methods=['PUT'])
+@jwt_required()
+@validate_body(StockShardsUpdate)
+def enable_stock_shards(shards_data, game_id):
+    """Split a hot game's stock across counter shards (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+
+        stock = shard_stock(game_id, shards_data.buckets)
+        db.session.commit()
+        return jsonify({'game_id': game_id, 'buckets': shards_data.buckets, 'stock': stock})
+
+    except LookupError:
+        db.session.rollback()
+        return jsonify({'error': 'Game not found'}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/admin/games/<int:game_id>/stock-shards', methods=['DELETE'])
+@jwt_required()
+def disable_stock_shards(game_id):
+    """Fold a game's stock shards back into a single counter (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+
+        stock = unshard_stock(game_id)
+        db.session.commit()
+        return jsonify({'game_id': game_id, 'buckets': 0, 'stock': stock})
+
+    except LookupError:
+        db.session.rollback()
+        return jsonify({'error': 'Game not found'}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
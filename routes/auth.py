@@ -0,0 +1,98 @@
+from flask import Blueprint, jsonify
+from models import db, User, UserCreate, UserLogin, UserResponse
+from flask_jwt_extended import (
+    create_access_token, get_jwt_identity,
+    create_refresh_token
+)
+from routes.validation import validate_body
+from services.db_routing import read_only, use_primary
+from routes.auth_utils import jwt_required
+
+auth_bp = Blueprint('auth', __name__)
+
+# Authentication endpoints
+@auth_bp.route('/auth/register', methods=['POST'])
+@validate_body(UserCreate)
+def register(user_data):
+    try:
+        # Check if user already exists
+        if User.query.filter_by(email=user_data.email).first():
+            return jsonify({'error': 'Email already registered'}), 400
+            
+        if User.query.filter_by(username=user_data.username).first():
+            return jsonify({'error': 'Username already taken'}), 400
+            
+        # Create new user
+        user = User(
+            email=user_data.email,
+            username=user_data.username,
+            role=user_data.role
+        )
+        user.set_password(user_data.password)
+        
+        db.session.add(user)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'User registered successfully',
+            'user': UserResponse(**user.to_dict()).dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/auth/login', methods=['POST'])
+@validate_body(UserLogin)
+def login(login_data):
+    try:
+        user = User.query.filter_by(email=login_data.email).first()
+        
+        if not user or not user.check_password(login_data.password):
+            return jsonify({'error': 'Invalid email or password'}), 401
+            
+        # Create access and refresh tokens
+        access_token = create_access_token(identity=user.id, additional_claims={'role': user.role})
+        refresh_token = create_refresh_token(identity=user.id)
+        
+        return jsonify({
+            'access_token': access_token,
+            'refresh_token': refresh_token,
+            'user': UserResponse(**user.to_dict()).dict()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/auth/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Get a new access token using refresh token"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+        
+    access_token = create_access_token(identity=user.id, additional_claims={'role': user.role})
+    
+    return jsonify({
+        'access_token': access_token
+    })
+
+@auth_bp.route('/auth/me', methods=['GET'])
+@jwt_required()
+@read_only
+def get_user_info():
+    """Get current user information"""
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user:
+        # Read your own write: a user who just registered may not be replicated yet
+        with use_primary():
+            user = User.query.get(current_user_id)
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+        
+    return jsonify(UserResponse(**user.to_dict()).dict())
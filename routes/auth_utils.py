@@ -0,0 +1,21 @@
+from functools import wraps
+from flask import current_app, g
+from flask_jwt_extended import verify_jwt_in_request
+from services.tracing import span
+
+def jwt_required(**options):
+    """flask_jwt_extended.jwt_required with token verification recorded as a span.
+
+    Sub-requests of POST /batch share the batch's app context and `g`, where
+    the access token was already verified (`g.jwt_preverified`); plain access
+    token checks are skipped for them.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def decorated(*args, **kwargs):
+            if options or not g.get('jwt_preverified'):
+                with span('jwt.verify'):
+                    verify_jwt_in_request(**options)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        return decorated
+    return decorator
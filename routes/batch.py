@@ -0,0 +1,83 @@
+from urllib.parse import urlsplit
+from flask import Blueprint, jsonify, current_app, g
+from flask_jwt_extended import get_jwt_identity
+from werkzeug.test import EnvironBuilder
+from models import db, BatchRequest
+from routes.validation import validate_body
+from services.db_routing import BATCH_TRANSACTION
+from routes.auth_utils import jwt_required
+
+batch_bp = Blueprint('batch', __name__)
+
+def _dispatch(app, sub_request):
+    """Run one sub-request through the app's full dispatch, without HTTP"""
+    url = urlsplit(sub_request.path)
+    if url.path.rstrip('/') == '/batch':
+        return 400, {'error': 'Batches cannot be nested'}
+
+    builder = EnvironBuilder(
+        path=url.path, query_string=url.query, method=sub_request.method,
+        json=sub_request.body if sub_request.body is not None else None
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    # The sub-request reuses the batch's app context, so it shares `g` (the
+    # verified JWT) and the database session
+    with app.request_context(environ):
+        response = app.full_dispatch_request()
+    try:
+        return response.status_code, response.get_json(silent=True)
+    finally:
+        response.close()
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required(optional=True)
+@validate_body(BatchRequest)
+def run_batch(batch):
+    """Run several API requests in one call, optionally in one transaction"""
+    limit = current_app.config['BATCH_MAX_REQUESTS']
+    if len(batch.requests) > limit:
+        return jsonify({'error': f'A batch may contain at most {limit} requests'}), 400
+    if batch.transaction and current_app.extensions.get('cart_store') is not None and any(
+            sub_request.method != 'GET' and urlsplit(sub_request.path).path.startswith('/api/cart')
+            for sub_request in batch.requests):
+        # Write-behind cart edits are applied in memory and cannot be rolled back
+        return jsonify({'error': 'Cart edits cannot join a batch transaction '
+                                 'with the write-behind cart backend'}), 400
+
+    # Verified once here; sub-requests skip verifying the same token again
+    g.jwt_preverified = get_jwt_identity() is not None
+    app = current_app._get_current_object()
+
+    responses = []
+    failed = False
+    if batch.transaction:
+        db.session.info[BATCH_TRANSACTION] = True
+    try:
+        for sub_request in batch.requests:
+            if failed:
+                responses.append({'status': 424, 'body': {
+                    'error': 'Not run: an earlier request in the transaction failed'}})
+                continue
+            status, body = _dispatch(app, sub_request)
+            responses.append({'status': status, 'body': body})
+            failed = batch.transaction and status >= 400
+    finally:
+        db.session.info.pop(BATCH_TRANSACTION, None)
+        g.jwt_preverified = False
+
+    result = {'responses': responses}
+    if batch.transaction:
+        try:
+            if failed:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'responses': responses, 'committed': False}), 500
+        result['committed'] = not failed
+    return jsonify(result)
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from models import db, User, Game, Cart, CartItem, UserResponse
+from services.catalog import catalog_page
+from services.db_routing import use_replica
+from routes.auth_utils import jwt_required
+from services.tracing import span
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+_executor = None
+
+def _catalog_json(app, page, limit):
+    """The `GET /games` body for a page, rendered in its own app context"""
+    with app.app_context(), use_replica(), span('bootstrap.catalog', page=page):
+        return app.json.dumps(catalog_page(page, limit)).encode()
+
+def _submit_catalog(page, limit):
+    """Render the catalog page on the worker pool; None when BOOTSTRAP_WORKERS is 0"""
+    global _executor
+    app = current_app._get_current_object()
+    workers = app.config['BOOTSTRAP_WORKERS']
+    if not workers:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bootstrap')
+    # Run in a copy of this context so the worker's spans join the request's trace
+    return _executor.submit(contextvars.copy_context().run, _catalog_json, app, page, limit)
+
+def cart_summary(user_id):
+    """Ids, quantities and totals of a user's cart, without game details"""
+    store = current_app.extensions.get('cart_store')
+    if store is not None:
+        cart_id, items = store.items(user_id)
+        prices = dict(db.session.execute(
+            db.select(Game.id, Game.price).where(Game.id.in_(items))
+        ).all()) if items else {}
+    else:
+        rows = db.session.execute(
+            db.select(Cart.id, CartItem.game_id, CartItem.quantity, Game.price)
+            .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+            .outerjoin(Game, Game.id == CartItem.game_id)
+            .where(Cart.user_id == user_id)
+        ).all()
+        cart_id = rows[0][0] if rows else None
+        items = {game_id: quantity for _, game_id, quantity, _ in rows if game_id is not None}
+        prices = {game_id: price for _, game_id, _, price in rows if price is not None}
+
+    return {
+        'id': cart_id,
+        'items': [{'game_id': game_id, 'quantity': quantity} for game_id, quantity in items.items()],
+        'item_count': len(items),
+        'total_quantity': sum(items.values()),
+        'total_price': sum(prices[g] * q for g, q in items.items() if g in prices)
+    }
+
+@bootstrap_bp.route('/api/bootstrap', methods=['GET'])
+@jwt_required()
+def bootstrap():
+    """Current user, cart summary and first catalog page in one response"""
+    page = request.args.get('page', 1, type=int)
+    limit = request.args.get('limit', 10, type=int)
+
+    # The catalog page comes from the snapshot when there is one, otherwise it
+    # is rendered on the worker pool while the user and cart are loaded here
+    catalog = current_app.extensions['snapshots'].page(page, limit)
+    future = _submit_catalog(page, limit) if catalog is None else None
+
+    current_user_id = get_jwt_identity()
+    user = db.session.get(User, current_user_id)
+    if not user:
+        if future is not None:
+            future.cancel()
+        return jsonify({'error': 'User not found'}), 404
+    user_data = UserResponse(**user.to_dict()).dict()
+    cart = cart_summary(current_user_id)
+
+    if catalog is None:
+        if future is not None:
+            catalog = future.result()
+        else:
+            with use_replica():
+                catalog = current_app.json.dumps(catalog_page(page, limit)).encode()
+
+    # The catalog bytes are spliced in as-is rather than parsed and re-encoded
+    dumps = current_app.json.dumps
+    body = b''.join([
+        b'{"user":', dumps(user_data).encode(),
+        b',"cart":', dumps(cart).encode(),
+        b',"games":', catalog, b'}'
+    ])
+    return current_app.response_class(body, mimetype='application/json')
@@ -0,0 +1,261 @@
+from flask import Blueprint, jsonify, current_app
+from models import db, Game, Cart, CartItem, CartItemCreate, CartItemUpdate, CartMerge
+from flask_jwt_extended import get_jwt_identity
+from routes.auth_utils import jwt_required
+from services.tracing import span
+from routes.idempotency import idempotent
+from routes.validation import validate_body
+from services.db_routing import after_commit
+
+cart_bp = Blueprint('cart', __name__)
+
+def _cart_store():
+    """The write-behind cart store when CART_BACKEND is 'write_behind', else None"""
+    return current_app.extensions.get('cart_store')
+
+def _count(game_id, **deltas):
+    after_commit(current_app.extensions['game_counters'].increment, game_id, **deltas)
+
+# Cart endpoints
+@cart_bp.route('/api/cart', methods=['GET'])
+@jwt_required()
+def get_cart():
+    """Get the current user's cart"""
+    current_user_id = get_jwt_identity()
+
+    store = _cart_store()
+    if store is not None:
+        return jsonify(store.to_dict(current_user_id))
+    
+    # Get or create cart for user
+    cart = Cart.query.filter_by(user_id=current_user_id).first()
+    if not cart:
+        cart = Cart(user_id=current_user_id)
+        db.session.add(cart)
+        db.session.commit()
+    
+    return jsonify(cart.to_dict())
+
+@cart_bp.route('/api/cart/add', methods=['POST'])
+@jwt_required()
+@idempotent
+@validate_body(CartItemCreate)
+def add_to_cart(cart_item_data):
+    """Add a game to the user's cart"""
+    try:
+        current_user_id = get_jwt_identity()
+
+        store = _cart_store()
+        if store is not None:
+            game = db.session.get(Game, cart_item_data.game_id)
+            if not game:
+                return jsonify({'error': 'Game not found'}), 404
+            if game.stock < cart_item_data.quantity:
+                return jsonify({'error': 'Not enough stock available'}), 400
+            quantity = store.add(current_user_id, cart_item_data.game_id, cart_item_data.quantity)
+            _count(cart_item_data.game_id,
+                   carts_containing=1 if quantity == cart_item_data.quantity else 0,
+                   units_in_carts=cart_item_data.quantity)
+            return jsonify(store.to_dict(current_user_id))
+        
+        # Get or create cart
+        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        if not cart:
+            cart = Cart(user_id=current_user_id)
+            db.session.add(cart)
+            db.session.commit()
+        
+        with span('cart.stock_check', game_id=cart_item_data.game_id):
+            # Check if game exists
+            game = Game.query.get(cart_item_data.game_id)
+            if not game:
+                return jsonify({'error': 'Game not found'}), 404
+                
+            # Check if game is in stock
+            if game.stock < cart_item_data.quantity:
+                return jsonify({'error': 'Not enough stock available'}), 400
+            
+        # Check if game already in cart
+        cart_item = CartItem.query.filter_by(
+            cart_id=cart.id,
+            game_id=cart_item_data.game_id
+        ).first()
+        
+        if cart_item:
+            # Update quantity if game already in cart
+            cart_item.quantity += cart_item_data.quantity
+        else:
+            # Add new item to cart
+            cart_item = CartItem(
+                cart_id=cart.id,
+                game_id=cart_item_data.game_id,
+                quantity=cart_item_data.quantity
+            )
+            db.session.add(cart_item)
+        is_new = cart_item.id is None
+        
+        db.session.commit()
+        _count(cart_item_data.game_id,
+               carts_containing=1 if is_new else 0,
+               units_in_carts=cart_item_data.quantity)
+        with span('cart.to_dict'):
+            payload = cart.to_dict()
+        return jsonify(payload)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@cart_bp.route('/api/cart/merge', methods=['POST'])
+@jwt_required()
+@idempotent
+@validate_body(CartMerge)
+def merge_cart(merge_data):
+    """Add a whole list of games to the cart at once, e.g. a guest cart after login"""
+    try:
+        current_user_id = get_jwt_identity()
+
+        # Repeated games are summed, as if each were added separately
+        quantities = {}
+        for item in merge_data.items:
+            quantities[item.game_id] = quantities.get(item.game_id, 0) + item.quantity
+
+        with span('cart.stock_check', games=len(quantities)):
+            stock = dict(db.session.execute(
+                db.select(Game.id, Game.stock).where(Game.id.in_(quantities))
+            ).all())
+            missing = sorted(set(quantities) - set(stock))
+            if missing:
+                return jsonify({'error': 'Game not found', 'game_ids': missing}), 404
+            short = sorted(game_id for game_id, quantity in quantities.items()
+                           if stock[game_id] < quantity)
+            if short:
+                return jsonify({'error': 'Not enough stock available', 'game_ids': short}), 400
+
+        store = _cart_store()
+        if store is not None:
+            for game_id, quantity in quantities.items():
+                new_quantity = store.add(current_user_id, game_id, quantity)
+                _count(game_id, carts_containing=1 if new_quantity == quantity else 0,
+                       units_in_carts=quantity)
+            return jsonify(store.to_dict(current_user_id))
+
+        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        if not cart:
+            cart = Cart(user_id=current_user_id)
+            db.session.add(cart)
+            db.session.flush()
+
+        existing = {item.game_id: item for item in CartItem.query.filter(
+            CartItem.cart_id == cart.id, CartItem.game_id.in_(quantities))}
+        for game_id, quantity in quantities.items():
+            if game_id in existing:
+                existing[game_id].quantity += quantity
+            else:
+                db.session.add(CartItem(cart_id=cart.id, game_id=game_id, quantity=quantity))
+        db.session.commit()
+
+        for game_id, quantity in quantities.items():
+            _count(game_id, carts_containing=0 if game_id in existing else 1,
+                   units_in_carts=quantity)
+        with span('cart.to_dict'):
+            payload = cart.to_dict()
+        return jsonify(payload)
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@cart_bp.route('/api/cart/update', methods=['PUT'])
+@jwt_required()
+@idempotent
+@validate_body(CartItemUpdate)
+def update_cart_item(cart_item_data):
+    """Update quantity of a game in the cart"""
+    try:
+        current_user_id = get_jwt_identity()
+        game_id = cart_item_data.game_id
+
+        store = _cart_store()
+        if store is not None:
+            if store.get_quantity(current_user_id, game_id) is None:
+                return jsonify({'error': 'Game not found in cart'}), 404
+            game = db.session.get(Game, game_id)
+            if not game or game.stock < cart_item_data.quantity:
+                return jsonify({'error': 'Not enough stock available'}), 400
+            previous = store.update(current_user_id, game_id, cart_item_data.quantity)
+            _count(game_id, units_in_carts=cart_item_data.quantity - previous)
+            return jsonify(store.to_dict(current_user_id))
+            
+        # Get cart
+        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        if not cart:
+            return jsonify({'error': 'Cart not found'}), 404
+            
+        # Get cart item
+        cart_item = CartItem.query.filter_by(
+            cart_id=cart.id,
+            game_id=game_id
+        ).first()
+        
+        if not cart_item:
+            return jsonify({'error': 'Game not found in cart'}), 404
+            
+        # Check if game is in stock
+        game = Game.query.get(game_id)
+        if game.stock < cart_item_data.quantity:
+            return jsonify({'error': 'Not enough stock available'}), 400
+            
+        # Update quantity
+        previous = cart_item.quantity
+        cart_item.quantity = cart_item_data.quantity
+        db.session.commit()
+        _count(game_id, units_in_carts=cart_item_data.quantity - previous)
+        
+        return jsonify(cart.to_dict())
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@cart_bp.route('/api/cart/remove/<int:game_id>', methods=['DELETE'])
+@jwt_required()
+@idempotent
+def remove_from_cart(game_id):
+    """Remove a game from the cart"""
+    try:
+        current_user_id = get_jwt_identity()
+
+        store = _cart_store()
+        if store is not None:
+            if store.get_quantity(current_user_id, game_id) is None:
+                return jsonify({'error': 'Game not found in cart'}), 404
+            previous = store.remove(current_user_id, game_id)
+            _count(game_id, carts_containing=-1, units_in_carts=-previous)
+            return jsonify(store.to_dict(current_user_id))
+        
+        # Get cart
+        cart = Cart.query.filter_by(user_id=current_user_id).first()
+        if not cart:
+            return jsonify({'error': 'Cart not found'}), 404
+            
+        # Get cart item
+        cart_item = CartItem.query.filter_by(
+            cart_id=cart.id,
+            game_id=game_id
+        ).first()
+        
+        if not cart_item:
+            return jsonify({'error': 'Game not found in cart'}), 404
+            
+        # Remove item
+        removed_quantity = cart_item.quantity
+        db.session.delete(cart_item)
+        db.session.commit()
+        _count(game_id, carts_containing=-1, units_in_carts=-removed_quantity)
+        
+        return jsonify(cart.to_dict())
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,254 @@
+import glob
+import os
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, abort
+from werkzeug.exceptions import RequestEntityTooLarge
+from models import db, Game, User, GameCreate, GameDetail, GameUpdate
+from services import images
+from routes.idempotency import idempotent
+from routes.validation import validate_body
+from services.catalog import catalog_page
+from services.db_routing import read_only, use_primary, after_commit
+from flask_jwt_extended import get_jwt_identity
+from routes.auth_utils import jwt_required
+
+games_bp = Blueprint('games', __name__)
+
+# Game endpoints with pagination
+@games_bp.route('/games', methods=['GET'])
+@read_only
+def get_games():
+    """Get all games with pagination"""
+    page = request.args.get('page', 1, type=int)
+    limit = request.args.get('limit', 10, type=int)
+
+    snapshot = current_app.extensions['snapshots'].page(page, limit)
+    if snapshot is not None:
+        return current_app.response_class(snapshot, mimetype='application/json')
+    
+    return jsonify(catalog_page(page, limit))
+
+@games_bp.route('/games/suggest', methods=['GET'])
+@read_only
+def suggest_games():
+    """Typeahead: games whose title, or a word in it, starts with a prefix"""
+    prefix = request.args.get('prefix', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    matches = current_app.extensions['title_index'].suggest(prefix, limit)
+    return jsonify({
+        'prefix': prefix,
+        'suggestions': [{'id': game_id, 'title': title} for game_id, title in matches]
+    })
+
+@games_bp.route('/games/<int:game_id>', methods=['GET'])
+@read_only
+def get_game(game_id):
+    """Get a specific game by ID"""
+    snapshot = current_app.extensions['snapshots'].game(game_id)
+    if snapshot is not None:
+        return current_app.response_class(snapshot, mimetype='application/json')
+
+    game = db.session.get(Game, game_id)
+    if not game:
+        # The replica may not have caught up with a game that was just created
+        with use_primary():
+            game = db.session.get(Game, game_id)
+    if not game:
+        return jsonify({'error': 'Game not found'}), 404
+    
+    return jsonify(game.to_dict())
+
+@games_bp.route('/games/<int:game_id>/related', methods=['GET'])
+@read_only
+def get_related_games(game_id):
+    """Get games frequently bought together with a game"""
+    limit = request.args.get('limit', type=int)
+    related = current_app.extensions['related_games'].related(game_id, limit)
+
+    games = {}
+    if related:
+        ids = [related_id for related_id, _ in related]
+        games = {game.id: game for game in Game.query.filter(Game.id.in_(ids)).all()}
+
+    return jsonify({
+        'game_id': game_id,
+        'related': [
+            dict(games[related_id].to_dict(), score=score)
+            for related_id, score in related if related_id in games
+        ]
+    })
+
+@games_bp.route('/games', methods=['POST'])
+@jwt_required()
+@idempotent
+@validate_body(GameCreate)
+def create_game(game_data):
+    """Create a new game (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+            
+        # Create new game
+        new_game = Game(
+            title=game_data.title,
+            description=game_data.description,
+            price=game_data.price,
+            image_url=game_data.image_url,
+            stock=game_data.stock,
+            created_by=user.id
+        )
+        
+        db.session.add(new_game)
+        db.session.commit()
+        after_commit(current_app.extensions['snapshots'].schedule_rebuild)
+        after_commit(current_app.extensions['title_index'].add, new_game.id, new_game.title)
+        
+        return jsonify({
+            'message': 'Game created successfully',
+            'game': GameDetail(**new_game.to_dict()).dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@games_bp.route('/games/<int:game_id>', methods=['PUT'])
+@jwt_required()
+@idempotent
+@validate_body(GameUpdate)
+def update_game(game_data, game_id):
+    """Update a specific game (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+            
+        game = db.session.get(Game, game_id)
+        if not game:
+            return jsonify({'error': 'Game not found'}), 404
+
+        # Update game fields
+        if game_data.title is not None:
+            game.title = game_data.title
+        if game_data.description is not None:
+            game.description = game_data.description
+        if game_data.price is not None:
+            game.price = game_data.price
+        if game_data.image_url is not None:
+            game.image_url = game_data.image_url
+        if game_data.stock is not None:
+            game.stock = game_data.stock
+        
+        db.session.commit()
+        after_commit(current_app.extensions['snapshots'].schedule_rebuild)
+        if game_data.title is not None:
+            after_commit(current_app.extensions['title_index'].add, game.id, game.title)
+        return jsonify({
+            'message': 'Game updated successfully',
+            'game': GameDetail(**game.to_dict()).dict()
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@games_bp.route('/games/<int:game_id>', methods=['DELETE'])
+@jwt_required()
+@idempotent
+def delete_game(game_id):
+    """Delete a specific game (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+        
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+            
+        game = db.session.get(Game, game_id)
+        if not game:
+            return jsonify({'error': 'Game not found'}), 404
+            
+        db.session.delete(game)
+        db.session.commit()
+        after_commit(current_app.extensions['snapshots'].schedule_rebuild)
+        after_commit(current_app.extensions['title_index'].remove, game_id)
+        return jsonify({'message': 'Game deleted successfully'})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@games_bp.route('/games/<int:game_id>/image', methods=['POST'])
+@jwt_required()
+def upload_game_image(game_id):
+    """Upload an image for a game (admin only)"""
+    try:
+        # Check if user is admin
+        claims = get_jwt_identity()
+        user = User.query.get(claims)
+
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin privileges required'}), 403
+
+        game = db.session.get(Game, game_id)
+        if not game:
+            return jsonify({'error': 'Game not found'}), 404
+
+        upload = request.files.get('image')
+        if upload is None:
+            return jsonify({'error': 'Image file is required'}), 400
+
+        app = current_app._get_current_object()
+        image_key, stored_name = images.store_original(app, images.read_upload(app, upload))
+        images.schedule_thumbnails(app, stored_name, image_key)
+
+        game.image_key = image_key
+        game.image_url = images.image_url(stored_name)
+        db.session.commit()
+        after_commit(current_app.extensions['snapshots'].schedule_rebuild)
+
+        return jsonify({
+            'message': 'Image uploaded successfully',
+            'game': game.to_dict()
+        }), 201
+
+    except images.ImageError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'Request body is too large'}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@games_bp.route('/images/<filename>', methods=['GET'])
+def get_image(filename):
+    """Serve a stored image or thumbnail"""
+    if not images.FILENAME_RE.match(filename):
+        abort(404)
+
+    directory = images.storage_dir(current_app)
+    max_age = current_app.config['IMAGE_CACHE_MAX_AGE']
+    if not os.path.exists(os.path.join(directory, filename)):
+        # Thumbnail not generated yet: serve the original, but don't let it be cached
+        image_key = filename.split('_', 1)[0].split('.', 1)[0]
+        originals = glob.glob(os.path.join(directory, f'{image_key}.*'))
+        originals = [path for path in originals if images.FILENAME_RE.match(os.path.basename(path))]
+        if not originals:
+            abort(404)
+        filename, max_age = os.path.basename(originals[0]), 0
+
+    # Content-hashed names never change, so clients may cache them indefinitely.
+    # conditional=True enables ETag/If-Modified-Since and Range requests.
+    response = send_from_directory(directory, filename, conditional=True, max_age=max_age)
+    if max_age:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
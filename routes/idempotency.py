@@ -0,0 +1,126 @@
+from datetime import datetime, timezone, timedelta
+from functools import wraps
+import hashlib
+import time
+from flask import request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _fingerprint():
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+def _claim(user_id, key, fingerprint):
+    """Insert an in-progress record for the key; returns (record, claimed)"""
+    record = None
+    for _ in range(3):
+        now = _now()
+        claim = IdempotencyKey(
+            user_id=user_id, key=key, fingerprint=fingerprint, claimed_at=now,
+            expires_at=now + timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+        )
+        db.session.add(claim)
+        try:
+            db.session.commit()
+            return claim, True
+        except IntegrityError:
+            db.session.rollback()
+
+        record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if record is None:
+            continue
+        now = _now()
+        stale = now - timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_TIMEOUT'])
+        if record.expires_at > now and not (record.status_code is None and record.claimed_at <= stale):
+            return record, False
+        # Expired, or abandoned by a request that died before storing its
+        # response: drop it and claim the key afresh. The conditions are
+        # re-checked so only one of several concurrent retries deletes it.
+        db.session.execute(db.delete(IdempotencyKey).where(
+            IdempotencyKey.id == record.id,
+            db.or_(IdempotencyKey.expires_at <= now,
+                   db.and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.claimed_at <= stale))
+        ))
+        db.session.commit()
+    return record, False
+
+def _release(record_id):
+    db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.id == record_id))
+    db.session.commit()
+
+def _wait(record):
+    """Poll until the request holding the key has stored its response"""
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT']
+    while record is not None and record.status_code is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        # End the transaction so the next read sees the other request's commit
+        db.session.rollback()
+        record = db.session.get(IdempotencyKey, record.id, populate_existing=True)
+    return record
+
+def _replay(record, fingerprint):
+    if record is not None and record.fingerprint != fingerprint:
+        return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+    record = _wait(record)
+    if record is None or record.status_code is None:
+        return jsonify({'error': f'A request with this {HEADER} is still in progress'}), 409
+    response = current_app.response_class(record.response_body, status=record.status_code,
+                                          mimetype=record.mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(f):
+    """Honour an `Idempotency-Key` header on a write endpoint.
+
+    The first request with a key claims it by inserting a row (the unique
+    constraint decides concurrent duplicates), runs the view and stores the
+    response. Retries with the same key and body get the stored response
+    without running the view; a retry that arrives while the first request is
+    still running waits up to IDEMPOTENCY_WAIT seconds for it. Server errors
+    are not stored, so the key can be retried. A claim whose response is still
+    missing after IDEMPOTENCY_LOCK_TIMEOUT seconds is treated as abandoned (the
+    worker was killed mid-request) and the next retry claims the key again. Keys are per user and expire
+    after IDEMPOTENCY_TTL seconds; `flask maintenance` deletes expired ones.
+    Apply it below `jwt_required()`.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return f(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        fingerprint = _fingerprint()
+        record, claimed = _claim(get_jwt_identity(), key, fingerprint)
+        if not claimed:
+            return _replay(record, fingerprint)
+
+        record_id = record.id
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(record_id)
+            raise
+
+        if response.status_code >= 500:
+            _release(record_id)
+        else:
+            db.session.execute(db.update(IdempotencyKey).where(IdempotencyKey.id == record_id).values(
+                status_code=response.status_code,
+                response_body=response.get_data(),
+                mimetype=response.mimetype
+            ))
+            db.session.commit()
+        return response
+    return decorated
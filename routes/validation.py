@@ -0,0 +1,38 @@
+from functools import lru_cache, wraps
+from flask import request, jsonify
+from pydantic import TypeAdapter, ValidationError
+from services.tracing import span
+
+@lru_cache(maxsize=None)
+def type_adapter(model):
+    """One TypeAdapter per model/type, built once and reused across requests"""
+    return TypeAdapter(model)
+
+def validation_error_response(error):
+    """The 400 payload used for every request validation failure"""
+    return jsonify({
+        'error': 'Invalid request body',
+        'details': error.errors(include_url=False, include_context=False, include_input=False)
+    }), 400
+
+def validate_body(model):
+    """Validate the raw request body against `model` and pass the result as
+    the view's first argument.
+
+    The body is parsed and validated in one pass with pydantic-core's
+    `validate_json`, skipping the intermediate dict that `request.get_json()`
+    followed by `Model(**data)` builds.
+    """
+    adapter = type_adapter(model)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                with span('validate', model=getattr(model, '__name__', str(model))):
+                    body = adapter.validate_json(request.get_data(cache=True) or b'{}')
+            except ValidationError as e:
+                return validation_error_response(e)
+            return f(body, *args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,368 @@
+"""Write-behind cart store.
+
+Active carts live in process memory; add/update/remove are O(1) dict
+operations and mark the cart dirty. Dirty carts are written to the database
+in one batched transaction every CART_FLUSH_INTERVAL seconds, when `flush()`
+is called (e.g. before checkout), and at interpreter exit. Clean carts that
+have not been touched for CART_IDLE_TTL seconds are dropped from memory by
+the flusher and reloaded from the database on next use.
+
+Durability:
+- Without a journal, edits made since the last flush are lost if the process
+  dies; at most CART_FLUSH_INTERVAL seconds of cart changes.
+- With CART_JOURNAL_PATH set, every edit is appended to a journal file before
+  it is acknowledged (written to the OS, fsync'd only if CART_JOURNAL_FSYNC).
+  Each process writes its own `<CART_JOURNAL_PATH>.<pid>` and holds an
+  exclusive lock on it. Journals whose lock is free belong to a dead process;
+  they are replayed into the database at startup and whenever a process
+  starts using the store, so a process crash loses nothing and only a machine
+  crash can lose un-fsync'd entries. A journal is truncated after each
+  successful flush of its process.
+- The flusher thread and the journal are started lazily, on first use in each
+  process, so they work under a preforking server (gunicorn with
+  preload_app) where the app is built before workers are forked.
+- The store is per process. Run it with a single worker process (any number of
+  threads) or with sticky routing per user; otherwise workers see stale carts.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from models import db, Game, Cart, CartItem
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class _CartState:
+    __slots__ = ('cart_id', 'items', 'item_ids', 'created_at', 'updated_at', 'touched_at')
+
+    def __init__(self, cart_id=None, items=None, item_ids=None, created_at=None, updated_at=None):
+        now = datetime.now(timezone.utc)
+        self.cart_id = cart_id
+        self.items = items or {}          # game_id -> quantity
+        self.item_ids = item_ids or {}    # game_id -> CartItem.id once persisted
+        self.created_at = created_at or now
+        self.updated_at = updated_at or now
+        self.touched_at = time.monotonic()
+
+def _try_lock(f):
+    """Take an exclusive lock on an open file without blocking"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+class WriteBehindCartStore:
+    def __init__(self, app=None):
+        self._carts = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._journal = None
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.journal_path = app.config.get('CART_JOURNAL_PATH')
+        self.journal_fsync = app.config.get('CART_JOURNAL_FSYNC', False)
+        self.flush_interval = app.config.get('CART_FLUSH_INTERVAL', 0)
+        self.idle_ttl = app.config.get('CART_IDLE_TTL', 0)
+        app.extensions['cart_store'] = self
+        if self.journal_path:
+            self.recover()
+
+    # Cart operations
+
+    def get_quantity(self, user_id, game_id):
+        state = self._state(user_id)
+        with self._lock:
+            return state.items.get(game_id)
+
+    def add(self, user_id, game_id, quantity):
+        """Add `quantity` of a game and return the new quantity"""
+        state = self._state(user_id)
+        with self._lock:
+            new_quantity = state.items.get(game_id, 0) + quantity
+            self._set(user_id, state, game_id, new_quantity)
+            return new_quantity
+
+    def update(self, user_id, game_id, quantity):
+        """Set the quantity of a game and return the previous quantity"""
+        state = self._state(user_id)
+        with self._lock:
+            previous = state.items.get(game_id, 0)
+            self._set(user_id, state, game_id, quantity)
+            return previous
+
+    def remove(self, user_id, game_id):
+        """Remove a game and return the quantity it had"""
+        state = self._state(user_id)
+        with self._lock:
+            previous = state.items.get(game_id, 0)
+            self._set(user_id, state, game_id, 0)
+            return previous
+
+    def items(self, user_id):
+        """(cart_id, {game_id: quantity}) for a user's cart"""
+        state = self._state(user_id)
+        with self._lock:
+            return state.cart_id, dict(state.items)
+
+    def to_dict(self, user_id):
+        """Same shape as Cart.to_dict(), built from the in-memory state"""
+        state = self._state(user_id)
+        with self._lock:
+            items = dict(state.items)
+            item_ids = dict(state.item_ids)
+            cart_id, created_at, updated_at = state.cart_id, state.created_at, state.updated_at
+
+        games = {}
+        if items:
+            games = {game.id: game for game in Game.query.filter(Game.id.in_(items)).all()}
+        item_dicts = [{
+            'id': item_ids.get(game_id),
+            'game_id': game_id,
+            'quantity': quantity,
+            'game': games[game_id].to_dict() if game_id in games else None
+        } for game_id, quantity in items.items()]
+        return {
+            'id': cart_id,
+            'user_id': user_id,
+            'items': item_dicts,
+            'total_price': sum(games[g].price * q for g, q in items.items() if g in games),
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at.isoformat()
+        }
+
+    # Persistence
+
+    def flush(self, user_ids=None):
+        """Write dirty carts to the database in one transaction; return the count"""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._dirty if user_ids is None else self._dirty & set(user_ids)
+                if not pending:
+                    return 0
+                snapshot = {uid: dict(self._carts[uid].items) for uid in pending}
+                self._dirty -= pending
+
+            try:
+                with self.app.app_context():
+                    ids = self._write(snapshot)
+            except Exception:
+                with self._lock:
+                    self._dirty |= set(snapshot)
+                raise
+
+            with self._lock:
+                for user_id, (cart_id, item_ids) in ids.items():
+                    state = self._carts[user_id]
+                    state.cart_id = cart_id
+                    state.item_ids = item_ids
+                if self._journal is not None and not self._dirty:
+                    self._journal.truncate(0)
+            return len(snapshot)
+
+    def evict_idle(self):
+        """Drop clean carts untouched for CART_IDLE_TTL seconds; return the count"""
+        if not self.idle_ttl:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            idle = [user_id for user_id, state in self._carts.items()
+                    if state.touched_at < cutoff and user_id not in self._dirty]
+            for user_id in idle:
+                del self._carts[user_id]
+        return len(idle)
+
+    def _write(self, snapshot):
+        user_ids = list(snapshot)
+        carts = {cart.user_id: cart for cart in
+                 Cart.query.filter(Cart.user_id.in_(user_ids)).all()}
+        game_ids = {game_id for items in snapshot.values() for game_id in items}
+        existing_games = {row[0] for row in
+                          db.session.query(Game.id).filter(Game.id.in_(game_ids)).all()} if game_ids else set()
+
+        for user_id, items in snapshot.items():
+            cart = carts.get(user_id)
+            if cart is None:
+                cart = carts[user_id] = Cart(user_id=user_id)
+                db.session.add(cart)
+            current = {item.game_id: item for item in cart.items}
+            for game_id, item in current.items():
+                if game_id not in items:
+                    db.session.delete(item)
+            for game_id, quantity in items.items():
+                if game_id not in existing_games:
+                    continue
+                if game_id in current:
+                    current[game_id].quantity = quantity
+                else:
+                    cart.items.append(CartItem(game_id=game_id, quantity=quantity))
+        db.session.commit()
+
+        return {user_id: (cart.id, {item.game_id: item.id for item in cart.items})
+                for user_id, cart in carts.items() if user_id in snapshot}
+
+    def recover(self):
+        """Replay journals left by dead processes into the database"""
+        paths = glob.glob(glob.escape(self.journal_path) + '.*')
+        if os.path.exists(self.journal_path):
+            # Written by versions that shared one journal between processes
+            paths.append(self.journal_path)
+
+        replayed = 0
+        for path in paths:
+            try:
+                journal = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with journal:
+                if not _try_lock(journal):
+                    # Held by a live process
+                    continue
+                entries = []
+                for line in journal:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                if entries:
+                    with self.app.app_context():
+                        carts = {}
+                        for entry in entries:
+                            if entry['u'] not in carts:
+                                carts[entry['u']] = self._load(entry['u']).items
+                            if entry['q'] > 0:
+                                carts[entry['u']][entry['g']] = entry['q']
+                            else:
+                                carts[entry['u']].pop(entry['g'], None)
+                        self._write(carts)
+                    replayed += len(entries)
+                os.remove(path)
+        if replayed:
+            logger.info('Recovered %d cart journal entries', replayed)
+        return replayed
+
+    def close(self):
+        atexit.unregister(self.close)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        flushed = False
+        try:
+            self.flush()
+            flushed = True
+        except Exception:
+            logger.exception('Final cart flush failed')
+        if self._journal is not None:
+            self._journal.close()
+            if flushed and os.path.exists(self._journal.name):
+                os.remove(self._journal.name)
+            self._journal = None
+        self._pid = None
+
+    # Internals
+
+    def _ensure_process(self):
+        """Open this process's journal and start its flusher on first use"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Forked from a process that was already using the store: its
+                # carts, journal and flusher thread belong to the parent
+                if self._journal is not None:
+                    self._journal.close()
+                self._carts = {}
+                self._dirty = set()
+                self._journal = None
+                self._thread = None
+
+            if self.journal_path:
+                self._journal = open(f'{self.journal_path}.{pid}', 'a', encoding='utf-8')
+                _try_lock(self._journal)
+            self._stop = threading.Event()
+            if self.flush_interval:
+                self._thread = threading.Thread(target=self._run, args=(self.flush_interval,),
+                                                name='cart-flusher', daemon=True)
+                self._thread.start()
+            atexit.register(self.close)
+            self._pid = pid
+
+        if self.journal_path and fcntl is not None:
+            # Pick up journals of workers that died since startup
+            self.recover()
+
+    def _load(self, user_id):
+        # Caller provides the app context
+        cart = Cart.query.filter_by(user_id=user_id).first()
+        if cart is None:
+            return _CartState()
+        return _CartState(
+            cart_id=cart.id,
+            items={item.game_id: item.quantity for item in cart.items},
+            item_ids={item.game_id: item.id for item in cart.items},
+            created_at=cart.created_at,
+            updated_at=cart.updated_at
+        )
+
+    def _state(self, user_id):
+        self._ensure_process()
+        with self._lock:
+            state = self._carts.get(user_id)
+            if state is not None:
+                state.touched_at = time.monotonic()
+                return state
+
+        with self.app.app_context():
+            loaded = self._load(user_id)
+        with self._lock:
+            return self._carts.setdefault(user_id, loaded)
+
+    def _set(self, user_id, state, game_id, quantity):
+        # Caller holds self._lock
+        if self._journal is not None:
+            self._journal.write(json.dumps({'u': user_id, 'g': game_id, 'q': quantity}) + '\n')
+            self._journal.flush()
+            if self.journal_fsync:
+                os.fsync(self._journal.fileno())
+        if quantity > 0:
+            state.items[game_id] = quantity
+        else:
+            state.items.pop(game_id, None)
+            state.item_ids.pop(game_id, None)
+        state.updated_at = datetime.now(timezone.utc)
+        state.touched_at = time.monotonic()
+        # Re-attach in case the cart was evicted between _state() and here
+        self._carts.setdefault(user_id, state)
+        self._dirty.add(user_id)
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+                self.evict_idle()
+            except Exception:
+                logger.exception('Cart flush failed')
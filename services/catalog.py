@@ -0,0 +1,13 @@
+from models import Game
+
+def catalog_page(page, limit):
+    """The `GET /games` payload for one page of the catalog"""
+    pagination = Game.query.paginate(page=page, per_page=limit, error_out=False)
+    games = pagination.items
+
+    return {
+        'games': [game.to_dict() for game in games],
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    }
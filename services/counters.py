@@ -0,0 +1,219 @@
+"""Incrementally maintained per-game popularity counters.
+
+The cart write paths report deltas with `increment()`. They accumulate in
+memory, one entry per game, and are written to `game_stats` in a single
+batched statement every STATS_FLUSH_INTERVAL seconds (and at exit), so a
+burst of clicks on one game becomes one UPDATE. The flusher thread starts on
+the first increment in each process, so workers forked from a preloading
+master (gunicorn preload_app) each flush their own deltas. Admin analytics read the
+table through its indexes without scanning `cart_items`.
+
+`flask stats rebuild` recomputes carts_containing and units_in_carts from
+`cart_items` and reports any drift; `flask stats verify` only reports. The
+rebuild is an explicit repair tool: it cannot see deltas still pending in the
+web processes or write-behind carts not yet flushed, which are applied again
+on top of the rebuilt values, so run it with cart writers quiesced.
+units_sold has no source table yet and is left as recorded by `record_sale()`.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db, CartItem, Game, GameStats
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('carts_containing', 'units_in_carts', 'units_sold')
+
+class GameCounters:
+    def __init__(self, app=None):
+        self._pending = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('STATS_FLUSH_INTERVAL', 0)
+        app.extensions['game_counters'] = self
+        app.cli.add_command(stats_cli)
+
+    def increment(self, game_id, **deltas):
+        """Queue counter deltas for a game, e.g. increment(3, units_in_carts=2)"""
+        self._ensure_process()
+        with self._lock:
+            pending = self._pending[game_id]
+            for name, delta in deltas.items():
+                pending[name] += delta
+
+    def record_sale(self, game_id, quantity):
+        """Hook for the checkout path: units leave carts and count as sold"""
+        self.increment(game_id, units_sold=quantity)
+
+    def flush(self):
+        """Apply pending deltas in one transaction; returns the number of games updated"""
+        with self._lock:
+            pending = {game_id: deltas for game_id, deltas in self._pending.items()
+                       if any(deltas.values())}
+            self._pending.clear()
+        if not pending:
+            return 0
+
+        try:
+            with self.app.app_context():
+                table = GameStats.__table__
+                existing = set(db.session.execute(
+                    db.select(table.c.game_id).where(table.c.game_id.in_(pending))
+                ).scalars())
+                missing = [game_id for game_id in pending if game_id not in existing]
+                if missing:
+                    live = set(db.session.execute(
+                        db.select(Game.id).where(Game.id.in_(missing))
+                    ).scalars())
+                    for game_id in missing:
+                        if game_id not in live:
+                            # Deleted since the delta was recorded
+                            del pending[game_id]
+                    if live:
+                        db.session.execute(table.insert(), [
+                            dict.fromkeys(COUNTERS, 0) | {'game_id': game_id} for game_id in live
+                        ])
+                if pending:
+                    db.session.execute(
+                        table.update().where(table.c.game_id == db.bindparam('gid')).values(
+                            **{name: table.c[name] + db.bindparam(f'd_{name}') for name in COUNTERS}
+                        ),
+                        [{'gid': game_id, **{f'd_{name}': deltas[name] for name in COUNTERS}}
+                         for game_id, deltas in pending.items()]
+                    )
+                db.session.commit()
+        except Exception:
+            # Put the deltas back so they are retried on the next flush
+            for game_id, deltas in pending.items():
+                self.increment(game_id, **deltas)
+            raise
+        return len(pending)
+
+    def top(self, metric, limit):
+        column = getattr(GameStats, metric)
+        return (GameStats.query
+                .filter(column > 0)
+                .order_by(column.desc(), GameStats.game_id)
+                .limit(limit)
+                .all())
+
+    def close(self):
+        atexit.unregister(self.close)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Final stats flush failed')
+        self._pid = None
+
+    def _ensure_process(self):
+        """Start this process's flusher on first use"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Forked from a process that was already counting: its deltas
+                # and flusher thread belong to the parent
+                with self._lock:
+                    self._pending.clear()
+                self._thread = None
+            self._stop = threading.Event()
+            if self.flush_interval:
+                self._thread = threading.Thread(target=self._run, args=(self.flush_interval,),
+                                                name='stats-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._pid = pid
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Stats flush failed')
+
+def cart_aggregates():
+    """{game_id: {'carts_containing': n, 'units_in_carts': n}} computed from cart_items"""
+    rows = db.session.execute(
+        db.select(CartItem.game_id, db.func.count(db.distinct(CartItem.cart_id)),
+                  db.func.coalesce(db.func.sum(CartItem.quantity), 0))
+        .group_by(CartItem.game_id)
+    ).all()
+    return {game_id: {'carts_containing': carts, 'units_in_carts': units}
+            for game_id, carts, units in rows}
+
+def verify_counters():
+    """List the games whose stored counters differ from cart_items"""
+    expected = cart_aggregates()
+    stored = {stats.game_id: stats for stats in GameStats.query.all()}
+    drift = []
+    for game_id in expected.keys() | stored.keys():
+        want = expected.get(game_id, {'carts_containing': 0, 'units_in_carts': 0})
+        have = stored.get(game_id)
+        for name, value in want.items():
+            actual = getattr(have, name) if have is not None else 0
+            if actual != value:
+                drift.append({'game_id': game_id, 'counter': name, 'stored': actual, 'expected': value})
+    return drift
+
+def rebuild_counters():
+    """Overwrite the cart counters from cart_items; returns the drift that was fixed"""
+    drift = verify_counters()
+    expected = cart_aggregates()
+    for stats in GameStats.query.all():
+        values = expected.pop(stats.game_id, {'carts_containing': 0, 'units_in_carts': 0})
+        stats.carts_containing = values['carts_containing']
+        stats.units_in_carts = values['units_in_carts']
+    for game_id, values in expected.items():
+        db.session.add(GameStats(game_id=game_id, units_sold=0, **values))
+    db.session.commit()
+    return drift
+
+@click.group('stats')
+def stats_cli():
+    """Maintain the game popularity counters."""
+
+def _report(drift):
+    for row in drift[:20]:
+        click.echo(f"game {row['game_id']} {row['counter']}: stored {row['stored']}, expected {row['expected']}")
+    if len(drift) > 20:
+        click.echo(f'... and {len(drift) - 20} more')
+
+@stats_cli.command('verify')
+@with_appcontext
+def verify_command():
+    """Compare stored counters with cart_items."""
+    current_app.extensions['game_counters'].flush()
+    drift = verify_counters()
+    _report(drift)
+    click.echo(f'{len(drift)} counters out of date')
+    if drift:
+        raise SystemExit(1)
+
+@stats_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute counters from cart_items."""
+    current_app.extensions['game_counters'].flush()
+    drift = rebuild_counters()
+    _report(drift)
+    click.echo(f'Rebuilt counters, fixed {len(drift)} out of date')
@@ -0,0 +1,84 @@
+"""Read-replica routing for the Flask-SQLAlchemy session.
+
+Views decorated with `read_only` send their SELECTs to the engine bound as
+REPLICA_BIND_KEY in SQLALCHEMY_BINDS (configured from DATABASE_REPLICA_URL).
+Everything else, including any flush, stays on the primary. When no replica
+is configured the decorator is a no-op.
+
+While `session.info[BATCH_TRANSACTION]` is set, `commit()` only flushes and
+reads stay on the primary, so the sub-requests of a transactional
+`POST /batch` see each other's writes and share one transaction. In-memory
+side effects of a write (title index, snapshots, counters) go through
+`after_commit()`, which holds them until that transaction commits and drops
+them if it rolls back.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context, current_app
+from flask_sqlalchemy.session import Session
+from services.tracing import span
+
+REPLICA_BIND_KEY = 'replica'
+BATCH_TRANSACTION = 'batch_transaction'
+AFTER_COMMIT = 'after_commit'
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get(BATCH_TRANSACTION) and replica_requested():
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        if self.info.get(BATCH_TRANSACTION):
+            # Inside a transactional POST /batch: the batch commits or rolls back once
+            self.flush()
+            return
+        with span('db.commit'):
+            super().commit()
+        for callback, args, kwargs in self.info.pop(AFTER_COMMIT, []):
+            callback(*args, **kwargs)
+
+    def rollback(self):
+        self.info.pop(AFTER_COMMIT, None)
+        super().rollback()
+
+def after_commit(callback, *args, **kwargs):
+    """Apply an in-memory side effect of a write the view has committed.
+
+    Runs immediately, except inside a transactional batch, where it waits for
+    the batch's commit and is discarded on rollback.
+    """
+    session = current_app.extensions['sqlalchemy'].session
+    if session.info.get(BATCH_TRANSACTION):
+        session.info.setdefault(AFTER_COMMIT, []).append((callback, args, kwargs))
+    else:
+        callback(*args, **kwargs)
+
+def replica_requested():
+    return has_app_context() and g.get('db_use_replica', False)
+
+@contextmanager
+def _route(use_replica):
+    previous = g.get('db_use_replica', False)
+    g.db_use_replica = use_replica
+    try:
+        yield
+    finally:
+        g.db_use_replica = previous
+
+def use_primary():
+    """Force reads inside the block onto the primary, e.g. to read your own write"""
+    return _route(False)
+
+def use_replica():
+    return _route(True)
+
+def read_only(f):
+    """Route the view's reads to the replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with use_replica():
+            return f(*args, **kwargs)
+    return decorated
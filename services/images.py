@@ -0,0 +1,129 @@
+import hashlib
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+# <content hash>[_<variant>].<ext>
+FILENAME_RE = re.compile(r'^[0-9a-f]{16,64}(_[a-z0-9]+)?\.(jpg|png|webp|gif)$')
+
+_executor = None
+_pending = set()
+
+class ImageError(ValueError):
+    """Raised when an upload is not an acceptable image"""
+
+def storage_dir(app):
+    path = app.config.get('IMAGE_STORAGE_DIR') or os.path.join(app.instance_path, 'images')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def read_upload(app, upload):
+    """Read an uploaded file, stopping one byte past IMAGE_MAX_BYTES"""
+    return upload.stream.read(app.config['IMAGE_MAX_BYTES'] + 1)
+
+def image_url(filename):
+    return f'/images/{filename}'
+
+def thumbnail_filename(image_key, variant):
+    return f'{image_key}_{variant}.jpg'
+
+def thumbnail_urls(image_key, sizes):
+    """Map each configured variant name to its URL for `image_key`"""
+    return {variant: image_url(thumbnail_filename(image_key, variant)) for variant in sizes}
+
+def _detect_format(data, max_pixels):
+    try:
+        from PIL import Image
+    except ImportError:
+        # The file name says nothing about the bytes; without Pillow there is
+        # no way to verify them, so nothing is stored
+        raise ImageError('Image uploads are unavailable: Pillow is not installed')
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+            fmt = img.format
+            width, height = img.size
+    except Exception:
+        raise ImageError('File is not a valid image')
+    # The dimensions come from the header; a small file can declare a huge
+    # canvas that thumbnailing would have to decode in full
+    if width * height > max_pixels:
+        raise ImageError(f'Image exceeds {max_pixels} pixels')
+    if fmt not in ALLOWED_FORMATS:
+        raise ImageError('Unsupported image type')
+    return fmt
+
+def store_original(app, data):
+    """Write the upload under a content-hashed name and return (image_key, filename).
+
+    Identical uploads map to the same file, so storing is idempotent and the
+    resulting URLs can be cached forever.
+    """
+    max_bytes = app.config['IMAGE_MAX_BYTES']
+    if not data:
+        raise ImageError('No image data')
+    if len(data) > max_bytes:
+        raise ImageError(f'Image exceeds {max_bytes} bytes')
+
+    fmt = _detect_format(data, app.config['IMAGE_MAX_PIXELS'])
+    image_key = hashlib.sha256(data).hexdigest()[:32]
+    stored_name = f'{image_key}.{ALLOWED_FORMATS[fmt]}'
+    path = os.path.join(storage_dir(app), stored_name)
+    if not os.path.exists(path):
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return image_key, stored_name
+
+def generate_thumbnails(directory, stored_name, image_key, sizes):
+    """Write one resized JPEG per configured variant next to the original"""
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning('Pillow is not installed; skipping thumbnails for %s', stored_name)
+        return []
+
+    written = []
+    with Image.open(os.path.join(directory, stored_name)) as original:
+        original = original.convert('RGB')
+        for variant, (width, height) in sizes.items():
+            path = os.path.join(directory, thumbnail_filename(image_key, variant))
+            if os.path.exists(path):
+                continue
+            thumb = original.copy()
+            thumb.thumbnail((width, height))
+            tmp_path = f'{path}.tmp{os.getpid()}'
+            thumb.save(tmp_path, 'JPEG', quality=85, optimize=True)
+            os.replace(tmp_path, path)
+            written.append(path)
+    return written
+
+def schedule_thumbnails(app, stored_name, image_key):
+    """Generate thumbnails on the background worker pool"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'],
+                                       thread_name_prefix='thumbnails')
+    future = _executor.submit(generate_thumbnails, storage_dir(app), stored_name,
+                              image_key, app.config['THUMBNAIL_SIZES'])
+    _pending.add(future)
+    future.add_done_callback(_thumbnail_done)
+    return future
+
+def _thumbnail_done(future):
+    _pending.discard(future)
+    if future.exception() is not None:
+        logger.error('Thumbnail generation failed', exc_info=future.exception())
+
+def wait_for_thumbnails(timeout=None):
+    """Block until all scheduled thumbnails are written (used by tests and shutdown)"""
+    for future in list(_pending):
+        future.result(timeout=timeout)
@@ -0,0 +1,281 @@
+"""Persisted background job queue.
+
+Jobs are rows in the `jobs` table, so they survive restarts. Handlers are
+plain functions registered with `@task('name')` and called with the job's
+payload as keyword arguments inside an app context.
+
+A `JobQueue` worker claims due jobs with a conditional UPDATE (safe across
+processes), runs them on a thread pool and retries failures with exponential
+backoff. Jobs left 'running' for longer than JOB_TIMEOUT by a worker that
+died are put back in the queue; every worker checks for them every
+JOB_TIMEOUT / 2 seconds. It runs either inside the web process (JOBS_IN_PROCESS=1) or as a
+separate process via `flask worker`. In the web process the worker starts
+on the first request (or enqueue) in each process, so workers forked from a
+preloading master (gunicorn preload_app) each run their own.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+import click
+from models import db, Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+def task(name):
+    """Register a function as the handler for jobs called `name`"""
+    def register(f):
+        _handlers[name] = f
+        return f
+    return register
+
+def _now():
+    # Stored datetimes are naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class JobQueue:
+    def __init__(self, app=None):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        # (queue wait since the job was due, run time) in seconds for recently finished jobs
+        self._latencies = deque(maxlen=1000)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config['JOB_WORKERS']
+        self.poll_interval = app.config['JOB_POLL_INTERVAL']
+        self.backoff = app.config['JOB_RETRY_BACKOFF']
+        self.max_backoff = app.config['JOB_RETRY_MAX_DELAY']
+        self.timeout = app.config['JOB_TIMEOUT']
+        app.extensions['job_queue'] = self
+        app.cli.add_command(worker_command)
+        self.in_process = app.config.get('JOBS_IN_PROCESS', False)
+        if self.in_process:
+            app.before_request(self._ensure_started)
+
+    # Producer side
+
+    def enqueue(self, name, payload=None, delay=0, max_attempts=None):
+        """Persist a job and wake the in-process worker; returns the Job"""
+        if name not in _handlers:
+            raise ValueError(f'Unknown job {name!r}')
+        job = Job(
+            name=name,
+            payload=payload or {},
+            max_attempts=max_attempts or self.app.config['JOB_MAX_ATTEMPTS'],
+            run_at=_now() + timedelta(seconds=delay)
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._ensure_started()
+        self._wake.set()
+        return job
+
+    # Worker side
+
+    def start(self):
+        """Start the poller and worker pool in this process (once per process)"""
+        pid = os.getpid()
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Forked from a running worker: its threads do not exist here
+                self._thread = None
+                self._executor = None
+                self._inflight = 0
+                self._inflight_lock = threading.Lock()
+                self._wake = threading.Event()
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._thread = threading.Thread(target=self._run, name='job-poller', daemon=True)
+            self._thread.start()
+            self._pid = pid
+
+    def _ensure_started(self):
+        if self.in_process and self._pid != os.getpid():
+            self.start()
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._pid = None
+
+    def run_pending(self):
+        """Run every due job in the calling thread; returns the number run"""
+        ran = 0
+        while True:
+            claimed = self._claim(self.workers)
+            if not claimed:
+                return ran
+            for job_id, due_at in claimed:
+                self._execute(job_id, due_at)
+            ran += len(claimed)
+
+    def requeue_stale(self):
+        """Return jobs left 'running' by a dead worker to the queue"""
+        cutoff = _now() - timedelta(seconds=self.timeout)
+        with self.app.app_context():
+            result = db.session.execute(
+                Job.__table__.update()
+                .where(Job.status == 'running', Job.started_at < cutoff)
+                .values(status='queued', run_at=_now())
+            )
+            db.session.commit()
+            return result.rowcount
+
+    def _run(self):
+        next_requeue = 0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_requeue:
+                try:
+                    requeued = self.requeue_stale()
+                    if requeued:
+                        logger.warning('Requeued %d stale jobs', requeued)
+                except Exception:
+                    logger.exception('Requeueing stale jobs failed')
+                next_requeue = time.monotonic() + self.timeout / 2
+            with self._inflight_lock:
+                free = self.workers - self._inflight
+            claimed = self._claim(free) if free > 0 else []
+            for job_id, due_at in claimed:
+                with self._inflight_lock:
+                    self._inflight += 1
+                self._executor.submit(self._execute_tracked, job_id, due_at)
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self, limit):
+        """Mark up to `limit` due jobs as running; returns [(job_id, run_at)]"""
+        table = Job.__table__
+        claimed = []
+        with self.app.app_context():
+            now = _now()
+            candidates = db.session.execute(
+                db.select(Job.id, Job.run_at)
+                .where(Job.status == 'queued', Job.run_at <= now)
+                .order_by(Job.run_at, Job.id)
+                .limit(limit)
+            ).all()
+            for job_id, due_at in candidates:
+                # Only one worker wins the queued -> running transition
+                result = db.session.execute(
+                    table.update()
+                    .where(table.c.id == job_id, table.c.status == 'queued')
+                    .values(status='running', started_at=now, attempts=table.c.attempts + 1)
+                )
+                if result.rowcount == 1:
+                    claimed.append((job_id, due_at))
+            db.session.commit()
+        return claimed
+
+    def _execute_tracked(self, job_id, due_at):
+        try:
+            self._execute(job_id, due_at)
+        finally:
+            with self._inflight_lock:
+                self._inflight -= 1
+            self._wake.set()
+
+    def _execute(self, job_id, due_at):
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            started = time.perf_counter()
+            try:
+                _handlers[job.name](**job.payload)
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                job.last_error = f'{type(e).__name__}: {e}'
+                if job.attempts >= job.max_attempts:
+                    job.status = 'failed'
+                    job.finished_at = _now()
+                    logger.error('Job %s (%s) failed permanently', job.id, job.name, exc_info=True)
+                else:
+                    delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1))
+                    job.status = 'queued'
+                    job.run_at = _now() + timedelta(seconds=delay)
+                    logger.warning('Job %s (%s) failed, retrying in %ss', job.id, job.name, delay)
+            else:
+                job = db.session.get(Job, job_id)
+                job.status = 'done'
+                job.finished_at = _now()
+                job.last_error = None
+            # Waiting starts when the job is due, not when a delayed job or
+            # retry was scheduled
+            self._latencies.append(((job.started_at - due_at).total_seconds(),
+                                    time.perf_counter() - started))
+            db.session.commit()
+
+    # Monitoring
+
+    def stats(self):
+        counts = dict(db.session.execute(
+            db.select(Job.status, db.func.count()).group_by(Job.status)
+        ).all())
+        oldest = db.session.execute(
+            db.select(db.func.min(Job.run_at)).where(Job.status == 'queued', Job.run_at <= _now())
+        ).scalar()
+        waits = [wait for wait, _ in self._latencies]
+        runs = [run for _, run in self._latencies]
+        return {
+            'depth': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'oldest_due_seconds': (_now() - oldest).total_seconds() if oldest else 0,
+            'wait_p50': _percentile(waits, 0.5),
+            'wait_p95': _percentile(waits, 0.95),
+            'run_p50': _percentile(runs, 0.5),
+            'run_p95': _percentile(runs, 0.95),
+            'recent_jobs': len(self._latencies)
+        }
+
+@click.command('worker')
+@click.option('--threads', type=int, default=None, help='Worker threads (defaults to JOB_WORKERS).')
+@click.option('--burst', is_flag=True, help='Run all due jobs and exit.')
+def worker_command(threads, burst):
+    """Run the background job worker."""
+    from flask import current_app
+    queue = current_app.extensions['job_queue']
+    if threads:
+        queue.workers = threads
+    queue.requeue_stale()
+    if burst:
+        click.echo(f'Ran {queue.run_pending()} jobs')
+        return
+
+    click.echo(f'Worker started with {queue.workers} threads')
+    queue.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo('Stopping worker')
+        queue.stop()
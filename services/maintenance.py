@@ -0,0 +1,179 @@
+"""Database maintenance: stale cart purging, orphan cleanup, expired
+Idempotency-Key responses and ANALYZE/VACUUM.
+
+Deletes run in batches of MAINTENANCE_BATCH_SIZE rows, each in its own short
+transaction, so no step holds table locks for long. Purged cart items are
+reported to the popularity counters as negative deltas, the same way a
+removal from a cart is, so game_stats stays in step without a rebuild. Run it with
+`flask maintenance`, or let the job queue repeat it every
+MAINTENANCE_INTERVAL seconds after `flask maintenance schedule`.
+"""
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db, Game, Cart, CartItem, Job, IdempotencyKey
+from services.jobs import task
+
+logger = logging.getLogger(__name__)
+
+def _delete_in_batches(select_ids, delete_ids, batch_size, pause):
+    total = 0
+    while True:
+        ids = db.session.execute(select_ids.limit(batch_size)).scalars().all()
+        if not ids:
+            return total
+        removed = delete_ids(ids)
+        db.session.commit()
+        if removed:
+            counters = current_app.extensions['game_counters']
+            for game_id, carts, units in removed:
+                counters.increment(game_id, carts_containing=-carts, units_in_carts=-units)
+        total += len(ids)
+        if len(ids) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+def _removed_items(condition):
+    """(game_id, carts, units) for the cart items about to be deleted"""
+    return db.session.execute(
+        db.select(CartItem.game_id, db.func.count(db.distinct(CartItem.cart_id)),
+                  db.func.sum(CartItem.quantity))
+        .where(condition).group_by(CartItem.game_id)
+    ).all()
+
+def purge_stale_carts(older_than_days, batch_size, pause=0):
+    """Delete carts (and their items) untouched for `older_than_days`"""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=older_than_days)
+    recent_item = db.select(CartItem.id).where(
+        CartItem.cart_id == Cart.id, CartItem.updated_at >= cutoff
+    ).exists()
+    select_ids = db.select(Cart.id).where(Cart.updated_at < cutoff, ~recent_item).order_by(Cart.id)
+
+    def delete_ids(ids):
+        removed = _removed_items(CartItem.cart_id.in_(ids))
+        db.session.execute(db.delete(CartItem).where(CartItem.cart_id.in_(ids)))
+        db.session.execute(db.delete(Cart).where(Cart.id.in_(ids)))
+        return removed
+
+    return _delete_in_batches(select_ids, delete_ids, batch_size, pause)
+
+def purge_orphaned_items(batch_size, pause=0):
+    """Delete cart items whose game or cart no longer exists"""
+    missing_game = ~db.select(Game.id).where(Game.id == CartItem.game_id).exists()
+    missing_cart = ~db.select(Cart.id).where(Cart.id == CartItem.cart_id).exists()
+    select_ids = db.select(CartItem.id).where(missing_game | missing_cart).order_by(CartItem.id)
+
+    def delete_ids(ids):
+        removed = _removed_items(CartItem.id.in_(ids))
+        db.session.execute(db.delete(CartItem).where(CartItem.id.in_(ids)))
+        return removed
+
+    return _delete_in_batches(select_ids, delete_ids, batch_size, pause)
+
+def purge_finished_jobs(older_than_days, batch_size, pause=0):
+    """Delete completed jobs; failed ones are kept for inspection"""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=older_than_days)
+    select_ids = db.select(Job.id).where(Job.status == 'done', Job.finished_at < cutoff).order_by(Job.id)
+
+    def delete_ids(ids):
+        db.session.execute(db.delete(Job).where(Job.id.in_(ids)))
+
+    return _delete_in_batches(select_ids, delete_ids, batch_size, pause)
+
+def purge_expired_idempotency_keys(batch_size, pause=0):
+    """Delete stored Idempotency-Key responses past their expiry"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    select_ids = db.select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= now).order_by(IdempotencyKey.id)
+
+    def delete_ids(ids):
+        db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+
+    return _delete_in_batches(select_ids, delete_ids, batch_size, pause)
+
+def optimize_database(vacuum=True):
+    """Refresh planner statistics and reclaim space; returns the statements run"""
+    engine = db.engine
+    dialect = engine.dialect.name
+    if dialect == 'sqlite':
+        statements = ['ANALYZE'] + (['VACUUM'] if vacuum else [])
+    elif dialect == 'postgresql':
+        statements = [f"{'VACUUM ' if vacuum else ''}ANALYZE {table.name}"
+                      for table in db.metadata.sorted_tables]
+    elif dialect in ('mysql', 'mariadb'):
+        tables = ', '.join(table.name for table in db.metadata.sorted_tables)
+        statements = [f'ANALYZE TABLE {tables}'] + ([f'OPTIMIZE TABLE {tables}'] if vacuum else [])
+    else:
+        logger.warning('No optimize statements for dialect %s', dialect)
+        return []
+
+    # VACUUM cannot run inside a transaction
+    db.session.remove()
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+    return statements
+
+def run_maintenance(cart_days=None, batch_size=None, vacuum=True):
+    """Run every step and report rows touched and seconds spent per step"""
+    config = current_app.config
+    cart_days = cart_days if cart_days is not None else config['CART_RETENTION_DAYS']
+    batch_size = batch_size or config['MAINTENANCE_BATCH_SIZE']
+    pause = config['MAINTENANCE_BATCH_PAUSE']
+
+    steps = [
+        ('stale_carts', lambda: purge_stale_carts(cart_days, batch_size, pause)),
+        ('orphaned_items', lambda: purge_orphaned_items(batch_size, pause)),
+        ('finished_jobs', lambda: purge_finished_jobs(config['JOB_RETENTION_DAYS'], batch_size, pause)),
+        ('idempotency_keys', lambda: purge_expired_idempotency_keys(batch_size, pause)),
+        # Apply the purges' counter deltas now rather than at the next interval
+        ('game_stats', lambda: current_app.extensions['game_counters'].flush()),
+        ('optimize', lambda: len(optimize_database(vacuum))),
+    ]
+    report = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        rows = step()
+        report[name] = {'rows': rows, 'seconds': round(time.perf_counter() - started, 3)}
+        logger.info('Maintenance %s: %s rows in %ss', name, rows, report[name]['seconds'])
+    return report
+
+def schedule_maintenance(delay=0):
+    """Queue a maintenance run unless one is already waiting; returns the Job or None"""
+    if Job.query.filter_by(name='maintenance.run', status='queued').first() is not None:
+        return None
+    return current_app.extensions['job_queue'].enqueue('maintenance.run', delay=delay)
+
+@task('maintenance.run')
+def scheduled_maintenance():
+    # Queue the next run first so a failing run does not end the schedule
+    interval = current_app.config['MAINTENANCE_INTERVAL']
+    if interval:
+        schedule_maintenance(delay=interval)
+    run_maintenance()
+
+@click.group('maintenance', invoke_without_command=True)
+@click.option('--cart-days', type=int, default=None, help='Purge carts idle for this many days.')
+@click.option('--batch-size', type=int, default=None, help='Rows deleted per transaction.')
+@click.option('--no-vacuum', is_flag=True, help='Only refresh statistics.')
+@click.pass_context
+@with_appcontext
+def maintenance_cli(ctx, cart_days, batch_size, no_vacuum):
+    """Purge stale carts and orphaned rows, then ANALYZE/VACUUM."""
+    if ctx.invoked_subcommand is not None:
+        return
+    report = run_maintenance(cart_days, batch_size, vacuum=not no_vacuum)
+    for name, result in report.items():
+        click.echo(f"{name}: {result['rows']} rows in {result['seconds']}s")
+
+@maintenance_cli.command('schedule')
+@with_appcontext
+def schedule_command():
+    """Queue a maintenance run that repeats every MAINTENANCE_INTERVAL seconds."""
+    if schedule_maintenance() is None:
+        click.echo('Maintenance is already scheduled')
+    else:
+        click.echo('Maintenance scheduled')
@@ -0,0 +1,221 @@
+""""Frequently bought together" recommendations from cart co-occurrence.
+
+The carts x games incidence matrix X is built from `cart_items` with SciPy
+sparse ops and C = X.T @ X counts, for every pair of games, the carts that
+contain both. Only the top RELATED_TOP_K neighbours per game are kept in a
+dict, so serving is a dictionary lookup.
+
+Every RELATED_REFRESH_INTERVAL seconds a background thread folds in cart
+items added since the last refresh: for the carts they belong to, the
+co-occurrence of their full contents minus that of their previous contents
+is added to C and only the affected rows are re-ranked. Removed items are not
+subtracted incrementally; a full rebuild every RELATED_FULL_REBUILD_INTERVAL
+seconds accounts for them.
+
+The index is per process and is built lazily in each worker. With a refresh
+interval, the first lookup starts the background thread, which builds the
+index and then keeps it fresh; lookups return no related games until the
+first build is done instead of blocking on it. Without one (tests, scripts),
+the first lookup builds the index itself, once, while concurrent lookups wait
+for that build.
+"""
+import logging
+import os
+import threading
+import time
+from models import db, CartItem
+
+logger = logging.getLogger(__name__)
+
+LOAD_CHUNK = 100000
+IN_CHUNK = 500
+
+def _scipy():
+    try:
+        import numpy as np
+        import scipy.sparse as sp
+    except ImportError as e:
+        raise RuntimeError('Related games need numpy and scipy installed') from e
+    return np, sp
+
+def cooccurrence(cart_ids, game_ids, games=None):
+    """Game x game co-occurrence counts for (cart_id, game_id) pairs.
+
+    Returns (games, counts): `games` is the sorted array of game ids that
+    index the rows/columns of the CSR matrix `counts`. Pass `games` to index
+    against an existing (superset) id array instead.
+    """
+    np, sp = _scipy()
+    cart_ids = np.asarray(cart_ids, dtype=np.int64)
+    game_ids = np.asarray(game_ids, dtype=np.int64)
+    carts, cart_idx = np.unique(cart_ids, return_inverse=True)
+    if games is None:
+        games, game_idx = np.unique(game_ids, return_inverse=True)
+    else:
+        game_idx = np.searchsorted(games, game_ids)
+
+    incidence = sp.csr_matrix(
+        (np.ones(len(cart_idx), dtype=np.int32), (cart_idx, game_idx)),
+        shape=(len(carts), len(games))
+    )
+    # A game counts once per cart however many rows it has there
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+
+    counts = (incidence.T @ incidence).tocsr()
+    counts.setdiag(0)
+    counts.eliminate_zeros()
+    return games, counts
+
+def top_k(games, counts, k, rows=None):
+    """{game_id: [(related_game_id, count), ...]} for the given row indices"""
+    np, _ = _scipy()
+    index = {}
+    indptr, indices, data = counts.indptr, counts.indices, counts.data
+    for row in (range(len(games)) if rows is None else rows):
+        start, end = indptr[row], indptr[row + 1]
+        cols, vals = indices[start:end], data[start:end]
+        if len(vals) > k:
+            keep = np.argpartition(-vals, k)[:k]
+            cols, vals = cols[keep], vals[keep]
+        related = games[cols]
+        order = np.lexsort((related, -vals))
+        index[int(games[row])] = [(int(g), int(v)) for g, v in zip(related[order], vals[order])]
+    return index
+
+def _reindex(counts, old_games, new_games):
+    """Embed `counts` (indexed by old_games) into the larger new_games space"""
+    np, sp = _scipy()
+    coo = counts.tocoo()
+    position = np.searchsorted(new_games, old_games)
+    return sp.csr_matrix((coo.data, (position[coo.row], position[coo.col])),
+                         shape=(len(new_games), len(new_games)))
+
+class RelatedGames:
+    def __init__(self, app=None):
+        self._index = {}
+        self._games = None
+        self._counts = None
+        self._watermark = 0
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread_pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.k = app.config['RELATED_TOP_K']
+        self.refresh_interval = app.config['RELATED_REFRESH_INTERVAL']
+        self.full_rebuild_interval = app.config['RELATED_FULL_REBUILD_INTERVAL']
+        app.extensions['related_games'] = self
+
+    def related(self, game_id, limit=None):
+        """Top related (game_id, count) pairs for a game"""
+        if self._built_at is None:
+            if self.refresh_interval:
+                self._start_refresher()
+            else:
+                with self._build_lock:
+                    if self._built_at is None:
+                        self.build()
+        return self._index.get(game_id, [])[:limit or self.k]
+
+    def build(self):
+        """Recompute the whole index from cart_items; returns seconds spent"""
+        np, _ = _scipy()
+        started = time.perf_counter()
+        with self._lock:
+            ids, cart_ids, game_ids = self._load(db.select(CartItem.id, CartItem.cart_id, CartItem.game_id))
+            games, counts = cooccurrence(cart_ids, game_ids)
+            self._games, self._counts = games, counts
+            self._index = top_k(games, counts, self.k)
+            self._watermark = int(ids.max()) if len(ids) else 0
+            self._built_at = time.monotonic()
+        seconds = time.perf_counter() - started
+        logger.info('Built related games for %d games from %d cart items in %.2fs',
+                    len(games), len(ids), seconds)
+        return seconds
+
+    def refresh(self):
+        """Fold in cart items added since the last build/refresh; returns rows re-ranked"""
+        np, _ = _scipy()
+        if self._built_at is None or time.monotonic() - self._built_at > self.full_rebuild_interval:
+            self.build()
+            return len(self._index)
+
+        with self._lock:
+            new_ids, new_carts, new_games = self._load(
+                db.select(CartItem.id, CartItem.cart_id, CartItem.game_id)
+                .where(CartItem.id > self._watermark)
+            )
+            if not len(new_ids):
+                return 0
+
+            affected = np.unique(new_carts).tolist()
+            chunks = [self._load(db.select(CartItem.id, CartItem.cart_id, CartItem.game_id)
+                                 .where(CartItem.cart_id.in_(affected[i:i + IN_CHUNK])))
+                      for i in range(0, len(affected), IN_CHUNK)]
+            ids = np.concatenate([c[0] for c in chunks])
+            cart_ids = np.concatenate([c[1] for c in chunks])
+            game_ids = np.concatenate([c[2] for c in chunks])
+
+            games = np.union1d(self._games, game_ids)
+            counts = self._counts
+            if len(games) != len(self._games):
+                counts = _reindex(counts, self._games, games)
+
+            old = ids <= self._watermark
+            _, after = cooccurrence(cart_ids, game_ids, games)
+            _, before = cooccurrence(cart_ids[old], game_ids[old], games)
+            delta = (after - before).tocsr()
+            delta.eliminate_zeros()
+            counts = (counts + delta).tocsr()
+
+            rows = np.unique(delta.nonzero()[0])
+            index = dict(self._index)
+            index.update(top_k(games, counts, self.k, rows))
+
+            self._games, self._counts, self._index = games, counts, index
+            self._watermark = max(self._watermark, int(new_ids.max()))
+            return len(rows)
+
+    def close(self):
+        self._stop.set()
+
+    def _load(self, statement):
+        np, _ = _scipy()
+        columns = [[], [], []]
+        result = db.session.execute(statement.execution_options(yield_per=LOAD_CHUNK))
+        for partition in result.partitions():
+            for column, values in zip(columns, zip(*partition)):
+                column.append(np.fromiter(values, dtype=np.int64, count=len(partition)))
+        return tuple(np.concatenate(column) if column else np.empty(0, dtype=np.int64)
+                     for column in columns)
+
+    def _start_refresher(self):
+        # Once per process: a thread started before a fork does not run in the child
+        pid = os.getpid()
+        if self._thread_pid == pid:
+            return
+        with self._start_lock:
+            if self._thread_pid == pid:
+                return
+            self._thread = threading.Thread(target=self._run, name='related-games', daemon=True)
+            self._thread.start()
+            self._thread_pid = pid
+
+    def _run(self):
+        # The first pass builds the index (refresh() builds when there is none yet)
+        delay = 0
+        while not self._stop.wait(delay):
+            delay = self.refresh_interval
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception:
+                logger.exception('Related games refresh failed')
@@ -0,0 +1,152 @@
+"""Synthetic data for load testing: `flask seed`.
+
+Rows are generated from a seeded random.Random, so the same options and seed
+always produce the same catalog, users and carts. They are written with Core
+executemany inserts in batches of --batch-size rows, one transaction per
+batch, or with COPY ... FROM STDIN on PostgreSQL. Every seeded user shares one
+password hash computed up front, so user rows cost no hashing.
+
+Seeded rows get explicit ids following the current maximum, so seeding
+appends to an existing database. Derived data is not refreshed; run
+`flask stats rebuild` (and `flask snapshots build` if enabled) afterwards.
+"""
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import datetime, timezone, timedelta
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+from models import db, User, Game, Cart, CartItem
+
+WORDS = ['dark', 'souls', 'legend', 'witcher', 'hunt', 'star', 'wars', 'portal', 'knight',
+         'hollow', 'final', 'fantasy', 'super', 'mario', 'city', 'racing', 'tactics', 'dragon',
+         'quest', 'zero', 'dawn', 'ghost', 'island', 'empire', 'chronicles', 'shadow', 'iron',
+         'galaxy', 'forge', 'rogue', 'lost', 'kingdom', 'storm', 'arena', 'velocity', 'echo']
+
+def _next_id(model):
+    return (db.session.execute(db.select(db.func.max(model.id))).scalar() or 0) + 1
+
+def _copy(table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+def _insert(table, columns, rows, batch_size):
+    """Write `rows` (tuples in `columns` order) in batches; returns (rows, seconds)"""
+    use_copy = db.engine.dialect.name == 'postgresql'
+    started = time.perf_counter()
+    total = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        if use_copy:
+            _copy(table, columns, batch)
+        else:
+            db.session.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+        db.session.commit()
+        total += len(batch)
+
+    if use_copy and total:
+        # COPY with explicit ids bypasses the serial sequence
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))"
+        ))
+        db.session.commit()
+    return total, time.perf_counter() - started
+
+def seed_database(games, users, carts, items_per_cart=3, seed=0, password='password123',
+                  batch_size=10000):
+    """Insert synthetic rows; returns {table: {'rows', 'seconds', 'rows_per_second'}}"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    carts = min(carts, users)
+    report = {}
+
+    def record(name, result):
+        rows, seconds = result
+        report[name] = {'rows': rows, 'seconds': round(seconds, 3),
+                        'rows_per_second': int(rows / seconds) if seconds else rows}
+
+    first_user = _next_id(User)
+    password_hash = generate_password_hash(password)
+    record('users', _insert(
+        User.__table__,
+        ('id', 'email', 'username', 'password_hash', 'role', 'created_at', 'updated_at'),
+        ((user_id, f'seed{user_id}@example.com', f'seed{user_id}', password_hash, 'user', now, now)
+         for user_id in range(first_user, first_user + users)),
+        batch_size
+    ))
+
+    first_game = _next_id(Game)
+
+    def game_rows():
+        for game_id in range(first_game, first_game + games):
+            title = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 4)))
+            created = now - timedelta(days=rng.randint(0, 3650))
+            yield (game_id, f'{title} {game_id}', f'Synthetic game {game_id}',
+                   round(rng.uniform(0.99, 69.99), 2), rng.randint(0, 500), created, created)
+
+    record('games', _insert(
+        Game.__table__,
+        ('id', 'title', 'description', 'price', 'stock', 'created_at', 'updated_at'),
+        game_rows(), batch_size
+    ))
+
+    # Cart owners and contents; game popularity follows a Zipf-like curve
+    owners = rng.sample(range(first_user, first_user + users), carts)
+    first_cart = _next_id(Cart)
+    touched = [now - timedelta(minutes=rng.randint(0, 90 * 24 * 60)) for _ in owners]
+    record('carts', _insert(
+        Cart.__table__,
+        ('id', 'user_id', 'created_at', 'updated_at'),
+        ((first_cart + i, user_id, touched[i], touched[i]) for i, user_id in enumerate(owners)),
+        batch_size
+    ))
+
+    game_ids = range(first_game, first_game + games)
+    cum_weights = list(itertools.accumulate(1 / rank ** 1.1 for rank in range(1, games + 1)))
+    first_item = _next_id(CartItem)
+
+    def item_rows():
+        item_id = first_item
+        for i in range(carts):
+            count = rng.randint(1, 2 * items_per_cart - 1)
+            for game_id in dict.fromkeys(rng.choices(game_ids, cum_weights=cum_weights, k=count)):
+                yield (item_id, first_cart + i, game_id, rng.choice((1, 1, 1, 2, 3)),
+                       touched[i], touched[i])
+                item_id += 1
+
+    if games:
+        record('cart_items', _insert(
+            CartItem.__table__,
+            ('id', 'cart_id', 'game_id', 'quantity', 'created_at', 'updated_at'),
+            item_rows(), batch_size
+        ))
+    return report
+
+@click.command('seed')
+@click.option('--games', type=int, default=100000, show_default=True)
+@click.option('--users', type=int, default=10000, show_default=True)
+@click.option('--carts', type=int, default=5000, show_default=True, help='At most one per seeded user.')
+@click.option('--items-per-cart', type=int, default=3, show_default=True, help='Average items per cart.')
+@click.option('--seed', type=int, default=0, show_default=True, help='Random seed.')
+@click.option('--password', default='password123', show_default=True, help='Password of every seeded user.')
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='Rows per transaction.')
+@with_appcontext
+def seed_cli(games, users, carts, items_per_cart, seed, password, batch_size):
+    """Insert synthetic games, users and carts for load testing."""
+    report = seed_database(games, users, carts, items_per_cart, seed, password, batch_size)
+    for name, result in report.items():
+        click.echo(f"{name}: {result['rows']} rows in {result['seconds']}s "
+                   f"({result['rows_per_second']} rows/s)")
+    click.echo('Run `flask stats rebuild` to refresh the popularity counters')
@@ -0,0 +1,206 @@
+"""Precomputed catalog snapshots.
+
+The first SNAPSHOT_PAGES pages of `GET /games` (at SNAPSHOT_PAGE_SIZE games
+per page) and every `GET /games/<id>` payload are rendered to JSON files in a
+new version directory under SNAPSHOT_DIR:
+
+    <SNAPSHOT_DIR>/<version>/games/page-<n>.json
+    <SNAPSHOT_DIR>/<version>/games/<id>.json
+    <SNAPSHOT_DIR>/current -> <version>
+
+`current` is swapped atomically with os.replace, so readers (the app or a
+front proxy serving SNAPSHOT_DIR/current) never see a half-written version.
+Catalog writes invalidate the current snapshot immediately and enqueue a
+rebuild job; until it runs, requests fall through to the database.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import Game, Job
+from services.catalog import catalog_page
+from services.jobs import task
+
+logger = logging.getLogger(__name__)
+
+CURRENT = 'current'
+INVALIDATED = 'INVALIDATED'
+KEEP_VERSIONS = 2
+
+class CatalogSnapshots:
+    def __init__(self, app=None):
+        self._cache = {}
+        self._cache_version = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['SNAPSHOTS_ENABLED']
+        self.directory = app.config.get('SNAPSHOT_DIR') or os.path.join(app.instance_path, 'snapshots')
+        self.pages = app.config['SNAPSHOT_PAGES']
+        self.page_size = app.config['SNAPSHOT_PAGE_SIZE']
+        app.extensions['snapshots'] = self
+        app.cli.add_command(snapshots_cli)
+
+    # Serving
+
+    def current_version(self):
+        path = os.path.join(self.directory, CURRENT)
+        try:
+            return os.path.basename(os.readlink(path))
+        except OSError:
+            # Platforms without symlinks use a pointer file
+            try:
+                with open(path, encoding='utf-8') as f:
+                    return f.read().strip() or None
+            except OSError:
+                return None
+
+    def read(self, name):
+        """Raw JSON bytes of a snapshot file, or None when there is no snapshot"""
+        if not self.enabled:
+            return None
+        version = self.current_version()
+        if version is None:
+            return None
+        with self._lock:
+            if version != self._cache_version:
+                self._cache, self._cache_version = {}, version
+            if name in self._cache:
+                return self._cache[name]
+        try:
+            with open(os.path.join(self.directory, version, name), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if version == self._cache_version:
+                self._cache[name] = data
+        return data
+
+    def page(self, page, limit):
+        if limit != self.page_size or not 1 <= page <= self.pages:
+            return None
+        return self.read(f'games/page-{page}.json')
+
+    def game(self, game_id):
+        return self.read(f'games/{game_id}.json')
+
+    # Building
+
+    def invalidate(self):
+        """Stop serving the current snapshot; in-flight builds will not publish"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, INVALIDATED), 'w', encoding='utf-8') as f:
+            f.write(str(time.time_ns()))
+        try:
+            os.remove(os.path.join(self.directory, CURRENT))
+        except FileNotFoundError:
+            pass
+
+    def schedule_rebuild(self):
+        """Invalidate now and rebuild on the job queue (called after catalog writes)"""
+        if not self.enabled:
+            return
+        self.invalidate()
+        # One queued rebuild covers any number of writes made before it starts
+        if Job.query.filter_by(name='snapshots.rebuild', status='queued').first() is None:
+            self.app.extensions['job_queue'].enqueue('snapshots.rebuild')
+
+    def build(self):
+        """Render a new version and publish it; returns stats, or None if superseded"""
+        started_ns = time.time_ns()
+        started = time.perf_counter()
+        version = f'{started_ns}-{uuid.uuid4().hex[:8]}'
+        root = os.path.join(self.directory, version)
+        os.makedirs(os.path.join(root, 'games'))
+        # Byte-for-byte what jsonify() would send for the same payload
+        def dumps(payload):
+            return current_app.json.response(payload).get_data()
+
+        pages = 0
+        for page in range(1, self.pages + 1):
+            payload = catalog_page(page, self.page_size)
+            self._write(root, f'games/page-{page}.json', dumps(payload))
+            pages += 1
+            if page >= payload['pages']:
+                break
+
+        games = 0
+        for game in Game.query.order_by(Game.id).yield_per(1000):
+            self._write(root, f'games/{game.id}.json', dumps(game.to_dict()))
+            games += 1
+
+        if self._invalidated_since(started_ns):
+            shutil.rmtree(root, ignore_errors=True)
+            logger.info('Snapshot %s superseded by a catalog write; discarded', version)
+            return None
+
+        self._publish(version)
+        self._prune(version)
+        return {'version': version, 'pages': pages, 'games': games,
+                'seconds': round(time.perf_counter() - started, 3)}
+
+    def _write(self, root, name, data):
+        with open(os.path.join(root, name), 'wb') as f:
+            f.write(data)
+
+    def _invalidated_since(self, started_ns):
+        try:
+            with open(os.path.join(self.directory, INVALIDATED), encoding='utf-8') as f:
+                return int(f.read() or 0) > started_ns
+        except (OSError, ValueError):
+            return False
+
+    def _publish(self, version):
+        current = os.path.join(self.directory, CURRENT)
+        tmp = f'{current}.{version}.tmp'
+        try:
+            os.symlink(version, tmp)
+        except (OSError, NotImplementedError):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(version)
+        os.replace(tmp, current)
+
+    def _prune(self, keep):
+        versions = sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+            and not os.path.islink(os.path.join(self.directory, name))
+        )
+        for name in versions[:-KEEP_VERSIONS]:
+            if name != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+@task('snapshots.rebuild')
+def rebuild_snapshots():
+    current_app.extensions['snapshots'].build()
+
+@click.group('snapshots')
+def snapshots_cli():
+    """Build and manage catalog snapshots."""
+
+@snapshots_cli.command('build')
+@with_appcontext
+def build_command():
+    """Render and publish a new catalog snapshot."""
+    stats = current_app.extensions['snapshots'].build()
+    if stats is None:
+        click.echo('Snapshot superseded by a concurrent catalog write')
+    else:
+        click.echo(f"Published {stats['version']}: {stats['pages']} pages, "
+                   f"{stats['games']} games in {stats['seconds']}s")
+
+@snapshots_cli.command('clear')
+@with_appcontext
+def clear_command():
+    """Stop serving the current snapshot."""
+    current_app.extensions['snapshots'].invalidate()
+    click.echo('Snapshot cleared')
@@ -0,0 +1,121 @@
+"""Stock decrements, with optional sharded counters for hot games.
+
+Normally a game's stock is the `games.stock` column and a purchase is one
+conditional UPDATE of that row. Under a flash sale every buyer queues on
+that single row lock.
+
+`shard_stock(game_id, buckets)` moves a game's stock into `buckets` rows of
+`stock_shards`. A purchase then picks a shard at random and decrements it
+with a conditional UPDATE, so concurrent buyers mostly lock different rows.
+If the random picks run dry, the purchase locks all of the game's shards in
+bucket order, takes the quantity from the total and spreads the remainder
+evenly again (rebalancing). `Game.stock` reads the sum of the shards, so
+callers see one number either way. `unshard_stock` folds the shards back
+into the column.
+
+The functions here do not commit; the caller's transaction does.
+"""
+import random
+from models import db, Game, StockShard
+
+SHARD_ATTEMPTS = 2
+
+def _evenly(total, buckets):
+    base, extra = divmod(total, buckets)
+    return [base + (1 if bucket < extra else 0) for bucket in range(buckets)]
+
+def shard_stock(game_id, buckets):
+    """Split a game's stock across `buckets` counter rows"""
+    game = db.session.execute(
+        db.select(Game).where(Game.id == game_id).with_for_update()
+    ).scalar_one_or_none()
+    if game is None:
+        raise LookupError(f'Game {game_id} not found')
+    total = game.stock
+    db.session.execute(db.delete(StockShard).where(StockShard.game_id == game_id))
+    db.session.execute(db.insert(StockShard), [
+        {'game_id': game_id, 'bucket': bucket, 'count': count}
+        for bucket, count in enumerate(_evenly(total, buckets))
+    ])
+    game.stock_count = 0
+    game.stock_buckets = buckets
+    db.session.flush()
+    db.session.expire(game, ['stock_shards'])
+    return total
+
+def unshard_stock(game_id):
+    """Move a sharded game's stock back into the games.stock column"""
+    game = db.session.execute(
+        db.select(Game).where(Game.id == game_id).with_for_update()
+    ).scalar_one_or_none()
+    if game is None:
+        raise LookupError(f'Game {game_id} not found')
+    if not game.stock_buckets:
+        return game.stock_count
+    total = game.stock
+    db.session.execute(db.delete(StockShard).where(StockShard.game_id == game_id))
+    game.stock_buckets = 0
+    game.stock_count = total
+    db.session.flush()
+    db.session.expire(game, ['stock_shards'])
+    return total
+
+def _rebalance_and_take(game_id, quantity):
+    """Lock every shard, take `quantity` from the total and re-spread the rest"""
+    shards = db.session.execute(
+        db.select(StockShard).where(StockShard.game_id == game_id)
+        .order_by(StockShard.bucket).with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+    total = sum(shard.count for shard in shards)
+    if not shards or total < quantity:
+        return False
+    for shard, count in zip(shards, _evenly(total - quantity, len(shards))):
+        shard.count = count
+    db.session.flush()
+    return True
+
+def decrement_stock(game_id, quantity):
+    """Take `quantity` units of a game; False (and nothing taken) if there are not enough"""
+    buckets = db.session.execute(
+        db.select(Game.stock_buckets).where(Game.id == game_id)
+    ).scalar()
+    if buckets is None:
+        return False
+
+    if not buckets:
+        result = db.session.execute(
+            db.update(Game)
+            .where(Game.id == game_id, Game.stock_count >= quantity, Game.stock_buckets == 0)
+            .values(stock_count=Game.stock_count - quantity)
+        )
+        return result.rowcount == 1
+
+    for bucket in random.sample(range(buckets), min(SHARD_ATTEMPTS, buckets)):
+        result = db.session.execute(
+            db.update(StockShard)
+            .where(StockShard.game_id == game_id, StockShard.bucket == bucket,
+                   StockShard.count >= quantity)
+            .values(count=StockShard.count - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            return True
+    return _rebalance_and_take(game_id, quantity)
+
+def increment_stock(game_id, quantity):
+    """Return units to stock, e.g. a cancelled order; sharded games use a random shard"""
+    buckets = db.session.execute(
+        db.select(Game.stock_buckets).where(Game.id == game_id)
+    ).scalar()
+    if not buckets:
+        db.session.execute(
+            db.update(Game).where(Game.id == game_id).values(stock_count=Game.stock_count + quantity)
+        )
+        return
+    db.session.execute(
+        db.update(StockShard)
+        .where(StockShard.game_id == game_id, StockShard.bucket == random.randrange(buckets))
+        .values(count=StockShard.count + quantity)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,171 @@
+"""In-memory prefix index over game titles for typeahead suggestions.
+
+Titles are normalized (case-folded, accents and punctuation stripped,
+whitespace collapsed) and stored as sorted parallel arrays of keys and game
+ids, so a lookup is a binary search followed by a short forward scan. Each
+title is indexed from its start and from the start of each later word (up to
+SUGGEST_WORDS_PER_TITLE), so "witch" finds "The Witcher 3".
+
+Memory is bounded by SUGGEST_MAX_KEYS; once full, further titles are not
+indexed until the next rebuild. The index is built on first use (once;
+concurrent first lookups wait for that build), kept in
+sync by the catalog write views in this process, and rebuilt from the
+database every SUGGEST_REFRESH_INTERVAL seconds to pick up writes made by
+other processes.
+"""
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from models import db, Game
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 64
+_non_word = re.compile(r'[^\w\s]+')
+_spaces = re.compile(r'\s+')
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _non_word.sub(' ', text)
+    return _spaces.sub(' ', text).strip()
+
+class TitleIndex:
+    def __init__(self, app=None):
+        self._keys = []
+        self._ids = []
+        self._titles = {}
+        self._game_keys = {}
+        self._built_at = None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread_pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_keys = app.config['SUGGEST_MAX_KEYS']
+        self.words_per_title = app.config['SUGGEST_WORDS_PER_TITLE']
+        self.refresh_interval = app.config['SUGGEST_REFRESH_INTERVAL']
+        app.extensions['title_index'] = self
+
+    def _index_keys(self, title):
+        normalized = normalize(title)
+        words = normalized.split(' ')
+        keys = []
+        position = 0
+        for word in words[:self.words_per_title]:
+            keys.append(normalized[position:position + MAX_KEY_LENGTH])
+            position += len(word) + 1
+        return [key for key in dict.fromkeys(keys) if key]
+
+    def build(self):
+        """Rebuild the whole index from the games table"""
+        started = time.perf_counter()
+        pairs = []
+        titles = {}
+        game_keys = {}
+        for game_id, title in db.session.execute(
+                db.select(Game.id, Game.title).execution_options(yield_per=10000)):
+            keys = self._index_keys(title)
+            if len(pairs) + len(keys) > self.max_keys:
+                logger.warning('Title index full at %d keys; remaining games not indexed', len(pairs))
+                break
+            titles[game_id] = title
+            game_keys[game_id] = keys
+            pairs.extend((key, game_id) for key in keys)
+        pairs.sort()
+
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._ids = [game_id for _, game_id in pairs]
+            self._titles = titles
+            self._game_keys = game_keys
+            self._built_at = time.monotonic()
+        self._start_refresher()
+        logger.info('Built title index: %d games, %d keys in %.2fs',
+                    len(titles), len(pairs), time.perf_counter() - started)
+
+    def add(self, game_id, title):
+        """Index a created or renamed game"""
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._remove(game_id)
+            keys = self._index_keys(title)
+            if len(self._keys) + len(keys) > self.max_keys:
+                return
+            for key in keys:
+                position = bisect.bisect_left(self._keys, key)
+                self._keys.insert(position, key)
+                self._ids.insert(position, game_id)
+            self._titles[game_id] = title
+            self._game_keys[game_id] = keys
+
+    def remove(self, game_id):
+        """Drop a deleted game from the index"""
+        with self._lock:
+            self._remove(game_id)
+
+    def _remove(self, game_id):
+        for key in self._game_keys.pop(game_id, []):
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == game_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+        self._titles.pop(game_id, None)
+
+    def suggest(self, prefix, limit=10):
+        """Up to `limit` (game_id, title) pairs whose title or a word in it starts with `prefix`"""
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.build()
+        prefix = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+
+        results = {}
+        with self._lock:
+            keys, ids = self._keys, self._ids
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+                game_id = ids[position]
+                if game_id not in results:
+                    results[game_id] = self._titles[game_id]
+                position += 1
+        return list(results.items())
+
+    def close(self):
+        self._stop.set()
+
+    def _start_refresher(self):
+        # Once per process: a thread started before a fork does not run in the child
+        pid = os.getpid()
+        if not self.refresh_interval or self._thread_pid == pid:
+            return
+        with self._start_lock:
+            if self._thread_pid == pid:
+                return
+            self._thread = threading.Thread(target=self._run, name='title-index', daemon=True)
+            self._thread.start()
+            self._thread_pid = pid
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                with self.app.app_context():
+                    self.build()
+            except Exception:
+                logger.exception('Title index refresh failed')
@@ -0,0 +1,256 @@
+"""Per-request phase tracing with OpenTelemetry-shaped spans.
+
+With TRACING_ENABLED, every request gets a root span, and nested spans are
+recorded for JWT verification, body validation, each SQL statement, each
+commit, and any block wrapped in `span()`. Spans carry OpenTelemetry ids,
+kinds, attributes and status. Spans opened outside a request are no-ops.
+
+- Head-based sampling: the decision is made when the request starts. An
+  incoming W3C `traceparent` header is honoured, including its sampled flag;
+  otherwise a fraction TRACE_SAMPLE_RATE of requests is sampled. Sampled
+  traces are appended to TRACE_EXPORT_PATH (default <instance>/traces.jsonl)
+  as OTLP/JSON `resourceSpans` lines. A collector can pick them up, or they
+  can be replayed to an OTLP endpoint.
+- Slow requests: a request taking longer than TRACE_SLOW_THRESHOLD seconds is
+  logged as a warning with its full span tree, whether or not it was
+  sampled.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+MAX_STATEMENT_LENGTH = 500
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = ContextVar('tracing_span', default=None)
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, trace, name, kind, parent_id, attributes):
+        self.trace = trace
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+        self.start = time.time_ns()
+        self.end = None
+        trace.spans.append(self)
+
+    def child(self, name, kind=KIND_INTERNAL, **attributes):
+        return Span(self.trace, name, kind, self.span_id, attributes)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        self.end = time.time_ns()
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or time.time_ns()),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error else {'code': STATUS_OK}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class Trace:
+    __slots__ = ('trace_id', 'sampled', 'spans')
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span; a no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    else:
+        child.finish()
+    finally:
+        _current.reset(token)
+
+def format_tree(trace):
+    """Indented, one line per span, children under their parent"""
+    children = {}
+    for s in trace.spans:
+        children.setdefault(s.parent_id, []).append(s)
+    roots = [s for s in trace.spans if s.parent_id not in {t.span_id for t in trace.spans}]
+
+    lines = []
+    def walk(s, depth):
+        detail = s.attributes.get('db.statement') or ''
+        error = f' ERROR {s.error}' if s.error else ''
+        lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.2f} ms{error} {detail}".rstrip())
+        for child in children.get(s.span_id, []):
+            walk(child, depth + 1)
+    for root in roots:
+        walk(root, 0)
+    return '\n'.join(lines)
+
+class Tracer:
+    def __init__(self, app=None):
+        self._export_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['tracer'] = self
+        if not app.config.get('TRACING_ENABLED'):
+            return
+        self.sample_rate = app.config['TRACE_SAMPLE_RATE']
+        self.slow_threshold = app.config['TRACE_SLOW_THRESHOLD']
+        self.export_path = (app.config.get('TRACE_EXPORT_PATH')
+                            or os.path.join(app.instance_path, 'traces.jsonl'))
+        self.service_name = app.config['TRACE_SERVICE_NAME']
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._end_request)
+
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+                event.listen(engine, 'handle_error', _handle_error)
+
+    def _start_request(self):
+        rule = request.url_rule.rule if request.url_rule else request.path
+        name = f'{request.method} {rule}'
+        attributes = {
+            'http.request.method': request.method,
+            'http.route': rule,
+            'url.path': request.path,
+        }
+
+        parent = _current.get()
+        if parent is not None:
+            # A sub-request dispatched inside another request (POST /batch)
+            current = parent.child(name, KIND_SERVER, **attributes)
+        else:
+            match = TRACEPARENT_RE.match(request.headers.get('traceparent', ''))
+            if match:
+                trace_id, parent_id, flags = match.groups()
+                sampled = bool(int(flags, 16) & 1)
+            else:
+                trace_id, parent_id = f'{random.getrandbits(128):032x}', None
+                sampled = random.random() < self.sample_rate
+            current = Span(Trace(trace_id, sampled), name, KIND_SERVER, parent_id, attributes)
+        g.setdefault('tracing_stack', []).append((current, _current.set(current)))
+
+    def _record_status(self, response):
+        stack = g.get('tracing_stack')
+        if stack:
+            stack[-1][0].set_attribute('http.response.status_code', response.status_code)
+        return response
+
+    def _end_request(self, error=None):
+        stack = g.get('tracing_stack')
+        if not stack:
+            return
+        current, token = stack.pop()
+        _current.reset(token)
+        current.finish(error)
+        if current.attributes.get('http.response.status_code', 500) >= 500 and current.error is None:
+            current.error = 'HTTP 5xx'
+        if stack:
+            return
+
+        if current.trace.sampled:
+            try:
+                self.export(current.trace)
+            except OSError:
+                logger.exception('Trace export failed')
+        if current.duration_ms > self.slow_threshold * 1000:
+            logger.warning('Slow request %s took %.1f ms (trace %s)\n%s',
+                           current.name, current.duration_ms, current.trace.trace_id,
+                           format_tree(current.trace))
+
+    def export(self, trace):
+        """Append a trace to the export file as one OTLP/JSON line"""
+        line = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [s.to_otlp() for s in trace.spans]}]
+        }]}, separators=(',', ':'))
+        with self._export_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            with open(self.export_path, 'a', encoding='utf-8') as exported:
+                exported.write(line + '\n')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None:
+        return
+    child = parent.child('db.query', kind=KIND_CLIENT, **{
+        'db.system': conn.dialect.name,
+        'db.statement': ' '.join(statement.split())[:MAX_STATEMENT_LENGTH],
+    })
+    if executemany:
+        child.set_attribute('db.executemany', True)
+    context._tracing = (child, _current.set(child))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    traced = getattr(context, '_tracing', None)
+    if traced is not None:
+        child, token = traced
+        child.finish()
+        _current.reset(token)
+        context._tracing = None
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    traced = getattr(context, '_tracing', None) if context is not None else None
+    if traced is not None:
+        child, token = traced
+        child.finish(exception_context.original_exception)
+        _current.reset(token)
+        context._tracing = None
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cumulative import time of the `app` module, in microseconds
+IMPORT_TIME_BUDGET_US = int(os.getenv('IMPORT_TIME_BUDGET_US', '1500000'))
+
+def _import_profile(statement, env=None):
+    """Run `statement` under `python -X importtime` and return {module: cumulative_us}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, **(env or {})}
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+def test_create_app_uses_given_config():
+    """Test that each factory call returns an independent, configured app"""
+    first = create_app(TestingConfig)
+    second = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+    assert first is not second
+    assert first.config['TESTING'] is True
+    assert second.config['TESTING'] is True
+    assert {'auth', 'games', 'cart'} <= set(first.blueprints)
+
+def test_create_app_serves_routes():
+    """Test that blueprints are registered on the factory-built app"""
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        response = app.test_client().get('/games')
+        assert response.status_code == 200
+        assert response.get_json()['total'] == 0
+        db.drop_all()
+
+def test_import_does_not_build_app():
+    """Test that importing the module defers app creation and rare imports"""
+    profile = _import_profile('import app')
+
+    assert 'flask_migrate' not in profile
+    assert 'alembic' not in profile
+
+def test_default_config_does_not_load_alembic():
+    """Test that building the app with the default config skips Flask-Migrate"""
+    env = {'DATABASE_URL': 'sqlite://', 'ENABLE_MIGRATIONS': ''}
+    profile = _import_profile('from app import create_app; from config import Config; '
+                              'create_app(Config)', env=env)
+
+    assert 'app' in profile
+    assert 'flask_migrate' not in profile
+    assert 'alembic' not in profile
+
+def test_models_import_does_not_load_pyjwt():
+    """Test that the legacy decorators import PyJWT lazily"""
+    profile = _import_profile('import models')
+    assert 'jwt' not in profile
+
+@pytest.mark.skipif(os.getenv('SKIP_IMPORT_BUDGET') == '1', reason='import budget disabled')
+def test_import_time_budget():
+    """Test that importing the application stays within its time budget"""
+    profile = _import_profile('import app')
+    assert profile['app'] < IMPORT_TIME_BUDGET_US
@@ -0,0 +1,136 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, CartItem
+
+@pytest.fixture
+def app():
+    app = create_app(type('BatchConfig', (TestingConfig,), {'BATCH_MAX_REQUESTS': 5}))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _create_user(client):
+    user = User(email="user@example.com", username="testuser")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.add_all([Game(title="Game A", price=10.0, stock=5),
+                        Game(title="Game B", price=20.0, stock=1)])
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": "user@example.com", "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def user_token(client):
+    """Create a regular user and return their token"""
+    return _create_user(client)
+
+def _batch(client, requests, token=None, transaction=False):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.post('/batch', headers=headers, content_type='application/json',
+                       data=json.dumps({"requests": requests, "transaction": transaction}))
+
+def test_batch_runs_sub_requests(client, user_token):
+    """Test that sub-requests run in order with one token check"""
+    response = _batch(client, [
+        {"method": "GET", "path": "/games?page=1&limit=1"},
+        {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 1, "quantity": 2}},
+        {"method": "GET", "path": "/api/cart"},
+        {"method": "GET", "path": "/games/99"},
+    ], token=user_token)
+    assert response.status_code == 200
+    responses = json.loads(response.data)['responses']
+    assert [r['status'] for r in responses] == [200, 200, 200, 404]
+    assert len(responses[0]['body']['games']) == 1
+    assert responses[2]['body']['items'][0]['quantity'] == 2
+    assert 'committed' not in json.loads(response.data)
+
+def test_batch_without_token(client, user_token):
+    """Test that anonymous batches may only reach public endpoints"""
+    responses = json.loads(_batch(client, [
+        {"method": "GET", "path": "/games"},
+        {"method": "GET", "path": "/api/cart"},
+    ]).data)['responses']
+    assert [r['status'] for r in responses] == [200, 401]
+
+def test_batch_transaction_commits(client, user_token):
+    """Test that a successful transactional batch commits every write"""
+    data = json.loads(_batch(client, [
+        {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 1, "quantity": 1}},
+        {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 2, "quantity": 1}},
+    ], token=user_token, transaction=True).data)
+    assert data['committed'] is True
+    assert CartItem.query.count() == 2
+
+def test_batch_transaction_rolls_back(app, client, user_token):
+    """Test that one failing sub-request rolls back the whole batch"""
+    data = json.loads(_batch(client, [
+        {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 1, "quantity": 1}},
+        {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 2, "quantity": 9}},
+        {"method": "GET", "path": "/api/cart"},
+    ], token=user_token, transaction=True).data)
+    assert [r['status'] for r in data['responses']] == [200, 400, 424]
+    assert data['committed'] is False
+    assert CartItem.query.count() == 0
+    assert app.extensions['game_counters'].flush() == 0
+
+def test_batch_limits(client, user_token):
+    """Test batch size limits and rejected sub-requests"""
+    too_many = [{"method": "GET", "path": "/games"}] * 6
+    assert _batch(client, too_many, token=user_token).status_code == 400
+    assert _batch(client, [], token=user_token).status_code == 400
+    assert _batch(client, [{"method": "TRACE", "path": "/games"}], token=user_token).status_code == 400
+
+    nested = json.loads(_batch(client, [{"method": "POST", "path": "/batch", "body": {}}],
+                               token=user_token).data)
+    assert nested['responses'][0]['status'] == 400
+
+def test_batch_rollback_discards_side_effects(client, user_token):
+    """Test that a rolled-back batch leaves no trace in the title index"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+    admin_token = json.loads(client.post('/auth/login', content_type='application/json', data=json.dumps(
+        {"email": "admin@example.com", "password": "admin123"})).data)['access_token']
+    assert json.loads(client.get('/games/suggest?prefix=zz').data)['suggestions'] == []
+
+    new_game = {"method": "POST", "path": "/games",
+                "body": {"title": "Zzyzx Phantom", "price": 5.0, "stock": 1}}
+    data = json.loads(_batch(client, [new_game, {"method": "GET", "path": "/games/99"}],
+                             token=admin_token, transaction=True).data)
+    assert data['committed'] is False
+    assert json.loads(client.get('/games/suggest?prefix=zz').data)['suggestions'] == []
+
+    data = json.loads(_batch(client, [new_game], token=admin_token, transaction=True).data)
+    assert data['committed'] is True
+    suggestions = json.loads(client.get('/games/suggest?prefix=zz').data)['suggestions']
+    assert [s['title'] for s in suggestions] == ["Zzyzx Phantom"]
+
+def test_batch_transaction_rejects_write_behind_cart_edits(tmp_path):
+    """Test that in-memory cart edits cannot join a batch transaction"""
+    app = create_app(type('WriteBehindBatchConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'carts.db'}",
+        'CART_BACKEND': 'write_behind',
+        'CART_FLUSH_INTERVAL': 0,
+    }))
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        token = _create_user(client)
+        response = _batch(client, [
+            {"method": "POST", "path": "/api/cart/add", "body": {"game_id": 1, "quantity": 1}},
+        ], token=token, transaction=True)
+        assert response.status_code == 400
+        assert app.extensions['cart_store'].items(1) == (None, {})
+        db.session.remove()
@@ -0,0 +1,98 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, Cart, CartItem
+
+def _make_app(**overrides):
+    app = create_app(type('BootstrapConfig', (TestingConfig,), overrides))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def app():
+    yield from _make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _create_user(client):
+    """Create a user with a two-game cart and return their token"""
+    user = User(email="user@example.com", username="testuser")
+    user.set_password("password123")
+    db.session.add(user)
+    for i in range(12):
+        db.session.add(Game(title=f"Game {i}", price=10.0 + i, stock=5))
+    db.session.commit()
+    cart = Cart(user_id=user.id)
+    db.session.add(cart)
+    db.session.flush()
+    db.session.add_all([CartItem(cart_id=cart.id, game_id=1, quantity=2),
+                        CartItem(cart_id=cart.id, game_id=3, quantity=1)])
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": "user@example.com", "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def user_token(client):
+    return _create_user(client)
+
+def _bootstrap(client, token, query=''):
+    return client.get(f'/api/bootstrap{query}', headers={'Authorization': f'Bearer {token}'})
+
+def test_bootstrap_matches_separate_calls(client, user_token):
+    """Test that the bootstrap parts equal /auth/me and /games responses"""
+    response = _bootstrap(client, user_token)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert data['user'] == json.loads(client.get('/auth/me', headers=headers).data)
+    assert data['games'] == json.loads(client.get('/games?page=1').data)
+    assert data['cart']['items'] == [{'game_id': 1, 'quantity': 2}, {'game_id': 3, 'quantity': 1}]
+    assert data['cart']['item_count'] == 2
+    assert data['cart']['total_quantity'] == 3
+    assert data['cart']['total_price'] == pytest.approx(10.0 * 2 + 12.0)
+
+    page = json.loads(_bootstrap(client, user_token, '?page=2&limit=5').data)['games']
+    assert page == json.loads(client.get('/games?page=2&limit=5').data)
+
+def test_bootstrap_without_cart(client, user_token):
+    """Test a user without a cart gets an empty summary"""
+    db.session.execute(db.delete(CartItem))
+    db.session.execute(db.delete(Cart))
+    db.session.commit()
+    cart = json.loads(_bootstrap(client, user_token).data)['cart']
+    assert cart == {'id': None, 'items': [], 'item_count': 0, 'total_quantity': 0, 'total_price': 0}
+
+def test_bootstrap_requires_token(client):
+    """Test that the endpoint needs a JWT"""
+    assert client.get('/api/bootstrap').status_code == 401
+
+def test_bootstrap_uses_snapshot(tmp_path):
+    """Test that a catalog snapshot is spliced into the response"""
+    for app in _make_app(SNAPSHOTS_ENABLED=True, SNAPSHOT_DIR=str(tmp_path / 'snapshots')):
+        client = app.test_client()
+        token = _create_user(client)
+        app.extensions['snapshots'].build()
+        snapshot = app.extensions['snapshots'].page(1, 10)
+        assert snapshot is not None
+        body = _bootstrap(client, token).data
+        assert body.endswith(b',"games":' + snapshot + b'}')
+
+def test_bootstrap_concurrent_catalog(tmp_path):
+    """Test the catalog rendered on the worker pool against a file database"""
+    database = f"sqlite:///{tmp_path / 'bootstrap.db'}"
+    for app in _make_app(BOOTSTRAP_WORKERS=2, SQLALCHEMY_DATABASE_URI=database):
+        client = app.test_client()
+        token = _create_user(client)
+        data = json.loads(_bootstrap(client, token).data)
+        assert data['games'] == json.loads(client.get('/games').data)
+        assert data['cart']['item_count'] == 2
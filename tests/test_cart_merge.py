@@ -0,0 +1,103 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, CartItem
+from services.stock import shard_stock
+
+@pytest.fixture(params=['database', 'write_behind'])
+def app(request, tmp_path):
+    config = {}
+    if request.param == 'write_behind':
+        config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'carts.db'}",
+            'CART_BACKEND': 'write_behind',
+            'CART_FLUSH_INTERVAL': 0,
+            'CART_JOURNAL_PATH': str(tmp_path / 'carts.journal'),
+        }
+    app = create_app(type('CartMergeConfig', (TestingConfig,), config))
+    with app.app_context():
+        db.create_all()
+        yield app
+        if 'cart_store' in app.extensions:
+            app.extensions['cart_store'].flush()
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def user_token(client):
+    """Create a regular user and three games, and return the user's token"""
+    user = User(email="user@example.com", username="testuser")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.add_all([Game(title="Game A", price=10.0, stock=5),
+                        Game(title="Game B", price=20.0, stock=2),
+                        Game(title="Game C", price=30.0, stock=8)])
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": "user@example.com", "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+def _merge(client, token, items):
+    return client.post('/api/cart/merge', data=json.dumps({"items": items}),
+                       content_type='application/json',
+                       headers={'Authorization': f'Bearer {token}'})
+
+def _quantities(response):
+    return {item['game_id']: item['quantity'] for item in json.loads(response.data)['items']}
+
+def test_merge_into_existing_cart(client, user_token):
+    """Test that merged items are added to what the cart already holds"""
+    client.post('/api/cart/add', data=json.dumps({"game_id": 1, "quantity": 1}),
+                content_type='application/json',
+                headers={'Authorization': f'Bearer {user_token}'})
+
+    response = _merge(client, user_token, [
+        {"game_id": 1, "quantity": 2},
+        {"game_id": 2, "quantity": 1},
+        {"game_id": 2, "quantity": 1},
+    ])
+    assert response.status_code == 200
+    assert _quantities(response) == {1: 3, 2: 2}
+
+    response = client.get('/api/cart', headers={'Authorization': f'Bearer {user_token}'})
+    assert _quantities(response) == {1: 3, 2: 2}
+
+def test_merge_is_all_or_nothing(client, user_token):
+    """Test that one missing or understocked game rejects the whole merge"""
+    response = _merge(client, user_token, [{"game_id": 1, "quantity": 1},
+                                           {"game_id": 99, "quantity": 1}])
+    assert response.status_code == 404
+    assert json.loads(response.data)['game_ids'] == [99]
+
+    response = _merge(client, user_token, [{"game_id": 1, "quantity": 1},
+                                           {"game_id": 2, "quantity": 2},
+                                           {"game_id": 2, "quantity": 1}])
+    assert response.status_code == 400
+    assert json.loads(response.data)['game_ids'] == [2]
+
+    response = client.get('/api/cart', headers={'Authorization': f'Bearer {user_token}'})
+    assert json.loads(response.data)['items'] == []
+    assert _merge(client, user_token, []).status_code == 400
+
+def test_merge_checks_sharded_stock(client, user_token):
+    """Test that the stock check reads sharded games' totals"""
+    shard_stock(3, 4)
+    db.session.commit()
+    assert _merge(client, user_token, [{"game_id": 3, "quantity": 9}]).status_code == 400
+    response = _merge(client, user_token, [{"game_id": 3, "quantity": 8}])
+    assert _quantities(response) == {3: 8}
+
+def test_merge_persists_in_database(app, client, user_token):
+    """Test that merged rows reach cart_items once flushed"""
+    _merge(client, user_token, [{"game_id": 1, "quantity": 2}, {"game_id": 3, "quantity": 1}])
+    store = app.extensions.get('cart_store')
+    if store is not None:
+        store.flush()
+    assert {item.game_id: item.quantity for item in CartItem.query} == {1: 2, 3: 1}
@@ -0,0 +1,162 @@
+import os
+import time
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, Cart, CartItem
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'carts.db'}",
+        'CART_BACKEND': 'write_behind',
+        'CART_FLUSH_INTERVAL': 0,
+        'CART_JOURNAL_PATH': str(tmp_path / 'carts.journal'),
+    }
+
+def _build(config):
+    return create_app(type('CartStoreConfig', (TestingConfig,), config))
+
+@pytest.fixture
+def app(config):
+    app = _build(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def user_token(client):
+    """Create a regular user and return their token"""
+    user = User(email="user@example.com", username="regularuser", role="user")
+    user.set_password("user123")
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "user@example.com",
+                              "password": "user123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def sample_game():
+    game = Game(title="Test Game", description="A test game", price=10.0, stock=50)
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+def _put(client, token, game_id, quantity):
+    return client.put('/api/cart/update',
+                      data=json.dumps({'game_id': game_id, 'quantity': quantity}),
+                      content_type='application/json',
+                      headers={'Authorization': f'Bearer {token}'})
+
+def _add(client, token, game_id, quantity):
+    return client.post('/api/cart/add',
+                       data=json.dumps({'game_id': game_id, 'quantity': quantity}),
+                       content_type='application/json',
+                       headers={'Authorization': f'Bearer {token}'})
+
+def test_edits_are_coalesced_until_flush(app, client, user_token, sample_game):
+    """Test that many cart edits become a single batched database write"""
+    assert _add(client, user_token, sample_game.id, 1).status_code == 200
+    for quantity in range(2, 8):
+        response = _put(client, user_token, sample_game.id, quantity)
+        assert response.status_code == 200
+    assert json.loads(response.data)['items'][0]['quantity'] == 7
+    assert json.loads(response.data)['total_price'] == 70.0
+    assert CartItem.query.count() == 0
+
+    assert app.extensions['cart_store'].flush() == 1
+    db.session.expire_all()
+    item = CartItem.query.one()
+    assert item.quantity == 7
+    assert app.extensions['cart_store'].flush() == 0
+
+def test_remove_is_flushed(app, client, user_token, sample_game):
+    """Test that removing an item deletes the persisted row on flush"""
+    _add(client, user_token, sample_game.id, 2)
+    app.extensions['cart_store'].flush()
+    response = client.delete(f'/api/cart/remove/{sample_game.id}',
+                             headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 200
+    assert json.loads(response.data)['items'] == []
+
+    app.extensions['cart_store'].flush()
+    db.session.expire_all()
+    assert CartItem.query.count() == 0
+    assert Cart.query.count() == 1
+
+def test_update_missing_item(client, user_token, sample_game):
+    """Test updating a game that is not in the cart"""
+    assert _put(client, user_token, sample_game.id, 3).status_code == 404
+
+def test_crash_recovery_replays_journal(app, config, client, user_token, sample_game):
+    """Test that unflushed edits survive a process crash via the journal"""
+    _add(client, user_token, sample_game.id, 1)
+    _put(client, user_token, sample_game.id, 4)
+
+    # Simulate a crash: in-memory state is gone and nothing was flushed
+    store = app.extensions['cart_store']
+    with store._lock:
+        store._dirty.clear()
+    store._journal.close()
+    store._journal = None
+    assert CartItem.query.count() == 0
+
+    restarted = _build(config)
+    with restarted.app_context():
+        item = CartItem.query.one()
+        assert item.quantity == 4
+        assert restarted.extensions['cart_store'].get_quantity(item.cart.user_id, sample_game.id) == 4
+
+def test_idle_carts_are_evicted(app, client, user_token, sample_game):
+    """Test that clean idle carts leave memory and reload from the database"""
+    store = app.extensions['cart_store']
+    _add(client, user_token, sample_game.id, 2)
+    store.idle_ttl = 0.01
+    time.sleep(0.02)
+    assert store.evict_idle() == 0  # dirty carts are kept
+    store.flush()
+    assert store.evict_idle() == 1
+    assert store._carts == {}
+    response = client.get('/api/cart', headers={'Authorization': f'Bearer {user_token}'})
+    assert json.loads(response.data)['items'][0]['quantity'] == 2
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_store_starts_per_process_after_fork(config):
+    """Test that a forked worker gets its own flusher thread and journal"""
+    app = _build(dict(config, CART_FLUSH_INTERVAL=0.1))
+    store = app.extensions['cart_store']
+    with app.app_context():
+        db.create_all()
+        game = Game(title="Test Game", price=10.0, stock=50)
+        db.session.add(game)
+        db.session.commit()
+        game_id = game.id
+    # Building the app (as a preloading master does) starts nothing
+    assert store._thread is None and store._journal is None
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            with app.app_context():
+                store.add(1, game_id, 3)
+                assert store._journal.name == f"{config['CART_JOURNAL_PATH']}.{os.getpid()}"
+                time.sleep(0.5)
+                db.session.remove()
+                if CartItem.query.one().quantity == 3:
+                    status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
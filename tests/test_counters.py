@@ -0,0 +1,155 @@
+import os
+import time
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, GameStats
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def counters(app):
+    return app.extensions['game_counters']
+
+def _token(client, email, role):
+    user = User(email=email, username=email.split('@')[0], role=role)
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": email, "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def games(app):
+    for i in range(1, 4):
+        db.session.add(Game(id=i, title=f"Game {i}", price=9.99, stock=100))
+    db.session.commit()
+
+def _add(client, token, game_id, quantity):
+    return client.post('/api/cart/add',
+                       data=json.dumps({'game_id': game_id, 'quantity': quantity}),
+                       content_type='application/json',
+                       headers={'Authorization': f'Bearer {token}'})
+
+def test_cart_edits_batch_into_one_flush(client, counters, games):
+    """Test that many cart edits for a game become one counter row update"""
+    token = _token(client, "user@example.com", "user")
+    for _ in range(5):
+        _add(client, token, 1, 1)
+    client.put('/api/cart/update',
+               data=json.dumps({'game_id': 1, 'quantity': 2}),
+               content_type='application/json',
+               headers={'Authorization': f'Bearer {token}'})
+    _add(client, token, 2, 3)
+    client.delete('/api/cart/remove/2', headers={'Authorization': f'Bearer {token}'})
+    assert GameStats.query.count() == 0
+
+    # Game 2 was added and removed again, so its deltas cancel out
+    assert counters.flush() == 1
+    stats = {row.game_id: row for row in GameStats.query.all()}
+    assert (stats[1].carts_containing, stats[1].units_in_carts) == (1, 2)
+    assert 2 not in stats
+
+def test_analytics_endpoint(client, counters, games):
+    """Test that admins get best sellers and most carted games"""
+    admin_token = _token(client, "admin@example.com", "admin")
+    for email in ("a@example.com", "b@example.com"):
+        _add(client, _token(client, email, "user"), 3, 1)
+    _add(client, admin_token, 1, 4)
+    counters.record_sale(2, 7)
+    counters.flush()
+
+    response = client.get('/admin/analytics', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [row['game_id'] for row in data['most_carted']] == [3, 1]
+    assert data['best_sellers'] == [{'game_id': 2, 'title': 'Game 2', 'carts_containing': 0,
+                                     'units_in_carts': 0, 'units_sold': 7}]
+
+def test_analytics_requires_admin(client):
+    """Test that regular users cannot read analytics"""
+    token = _token(client, "user@example.com", "user")
+    response = client.get('/admin/analytics', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 403
+
+def test_verify_and_rebuild(app, client, counters, games):
+    """Test that drift is detected and fixed by the rebuild command"""
+    token = _token(client, "user@example.com", "user")
+    _add(client, token, 1, 2)
+    counters.flush()
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['stats', 'verify']).exit_code == 0
+
+    stats = db.session.get(GameStats, 1)
+    stats.units_in_carts = 99
+    db.session.commit()
+    result = runner.invoke(args=['stats', 'verify'])
+    assert result.exit_code == 1
+    assert 'stored 99, expected 2' in result.output
+
+    assert 'fixed 1' in runner.invoke(args=['stats', 'rebuild']).output
+    db.session.expire_all()
+    assert db.session.get(GameStats, 1).units_in_carts == 2
+
+def test_deleting_a_game_removes_its_stats(client, counters, games):
+    """Test that a carted game can be deleted with foreign keys enforced"""
+    db.session.execute(db.text('PRAGMA foreign_keys=ON'))
+    admin_token = _token(client, "admin@example.com", "admin")
+    _add(client, admin_token, 1, 2)
+    client.delete('/api/cart/remove/1', headers={'Authorization': f'Bearer {admin_token}'})
+    counters.record_sale(1, 1)
+    counters.flush()
+    assert db.session.get(GameStats, 1) is not None
+
+    response = client.delete('/games/1', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert db.session.get(GameStats, 1) is None
+
+    # Deltas still queued for a deleted game are dropped, not retried forever
+    counters.increment(1, units_sold=1)
+    assert counters.flush() == 0
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_flusher_starts_per_process_after_fork(tmp_path):
+    """Test that a forked worker flushes its own deltas on the interval"""
+    app = create_app(type('ForkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'stats.db'}",
+        'STATS_FLUSH_INTERVAL': 0.1,
+    }))
+    counters = app.extensions['game_counters']
+    with app.app_context():
+        db.create_all()
+        db.session.add(Game(id=1, title="Game 1", price=9.99, stock=100))
+        db.session.commit()
+        db.engine.dispose()
+    # Building the app (as a preloading master does) starts no thread
+    assert counters._thread is None
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            counters.increment(1, units_in_carts=3)
+            time.sleep(0.5)
+            with app.app_context():
+                if db.session.get(GameStats, 1).units_in_carts == 3:
+                    status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert counters._thread is None
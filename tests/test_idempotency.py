@@ -0,0 +1,147 @@
+import json
+from datetime import datetime, timezone, timedelta
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, CartItem, IdempotencyKey
+from services.maintenance import purge_expired_idempotency_keys
+
+@pytest.fixture
+def app():
+    config = type('IdempotencyConfig', (TestingConfig,), {'IDEMPOTENCY_WAIT': 0.1})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _token(client, email, username, role='user'):
+    user = User(email=email, username=username, role=role)
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": email, "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def user_token(client):
+    return _token(client, "user@example.com", "testuser")
+
+@pytest.fixture
+def game(app):
+    game = Game(title="Test Game", price=59.99, stock=10)
+    db.session.add(game)
+    db.session.commit()
+    return game.id
+
+def _add(client, token, game_id, key=None, quantity=1):
+    headers = {'Authorization': f'Bearer {token}'}
+    if key is not None:
+        headers['Idempotency-Key'] = key
+    return client.post('/api/cart/add', headers=headers, content_type='application/json',
+                       data=json.dumps({"game_id": game_id, "quantity": quantity}))
+
+def test_retry_replays_first_response(client, user_token, game):
+    """Test that a retried add is answered from the store without adding again"""
+    first = _add(client, user_token, game, key='abc')
+    retry = _add(client, user_token, game, key='abc')
+    assert first.status_code == retry.status_code == 200
+    assert retry.data == first.data
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert CartItem.query.one().quantity == 1
+
+    # A new key is a new request
+    _add(client, user_token, game, key='def')
+    assert CartItem.query.one().quantity == 2
+
+def test_requests_without_key_are_not_deduplicated(client, user_token, game):
+    """Test that requests without the header behave as before"""
+    _add(client, user_token, game)
+    _add(client, user_token, game)
+    assert CartItem.query.one().quantity == 2
+
+def test_key_reused_with_different_body(client, user_token, game):
+    """Test that reusing a key for a different request is rejected"""
+    _add(client, user_token, game, key='abc')
+    response = _add(client, user_token, game, key='abc', quantity=3)
+    assert response.status_code == 422
+    assert CartItem.query.one().quantity == 1
+
+def test_keys_are_scoped_per_user(client, user_token, game):
+    """Test that two users may use the same key"""
+    other_token = _token(client, "other@example.com", "otheruser")
+    _add(client, user_token, game, key='abc')
+    _add(client, other_token, game, key='abc')
+    assert CartItem.query.count() == 2
+
+def test_in_progress_duplicate(client, user_token, game):
+    """Test that a duplicate of a request still running gets a conflict"""
+    _add(client, user_token, game, key='first')
+    completed = IdempotencyKey.query.one()
+    # A claim with the same request fingerprint whose response is not stored yet
+    db.session.add(IdempotencyKey(
+        user_id=completed.user_id, key='abc', fingerprint=completed.fingerprint,
+        claimed_at=datetime.now(timezone.utc),
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+    ))
+    db.session.commit()
+
+    response = _add(client, user_token, game, key='abc')
+    assert response.status_code == 409
+    assert CartItem.query.one().quantity == 1
+
+def test_abandoned_claim_is_reclaimed(client, user_token, game):
+    """Test that an in-progress claim older than the lock timeout frees its key"""
+    _add(client, user_token, game, key='first')
+    completed = IdempotencyKey.query.one()
+    # Left behind by a worker killed before it stored a response
+    db.session.add(IdempotencyKey(
+        user_id=completed.user_id, key='abc', fingerprint=completed.fingerprint,
+        claimed_at=datetime.now(timezone.utc) - timedelta(seconds=120),
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+    ))
+    db.session.commit()
+
+    response = _add(client, user_token, game, key='abc')
+    assert response.status_code == 200
+    assert 'Idempotent-Replayed' not in response.headers
+    assert CartItem.query.one().quantity == 2
+
+    retry = _add(client, user_token, game, key='abc')
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert CartItem.query.one().quantity == 2
+
+def test_server_errors_are_not_stored(client, user_token, game, monkeypatch):
+    """Test that a failed request releases its key for a retry"""
+    monkeypatch.setattr(CartItem, 'to_dict', lambda self: 1 / 0)
+    assert _add(client, user_token, game, key='abc').status_code == 500
+    assert IdempotencyKey.query.count() == 0
+
+def test_expired_keys(client, user_token, game):
+    """Test that expired keys are claimed afresh and purged by maintenance"""
+    _add(client, user_token, game, key='abc')
+    IdempotencyKey.query.update({'expires_at': datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.session.commit()
+
+    assert purge_expired_idempotency_keys(batch_size=10) == 1
+    _add(client, user_token, game, key='abc')
+    assert CartItem.query.one().quantity == 2
+
+def test_admin_create_game_retry(client, game):
+    """Test that a retried POST /games creates one game"""
+    token = _token(client, "admin@example.com", "adminuser", role='admin')
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'new-game-1'}
+    body = json.dumps({"title": "New Game", "price": 19.99, "stock": 5})
+    first = client.post('/games', headers=headers, data=body, content_type='application/json')
+    retry = client.post('/games', headers=headers, data=body, content_type='application/json')
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == first.data
+    assert Game.query.filter_by(title="New Game").count() == 1
@@ -0,0 +1,127 @@
+import io
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User
+from services import images
+
+Image = pytest.importorskip('PIL.Image')
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['IMAGE_STORAGE_DIR'] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_token(client):
+    """Create an admin user and return their token"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "admin@example.com",
+                              "password": "admin123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def sample_game():
+    game = Game(title="Test Game", description="A test game", price=29.99, stock=10)
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+def _png(size=(800, 400)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def _upload(client, game_id, token, data, filename='cover.png'):
+    return client.post(f'/games/{game_id}/image',
+                       data={'image': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data',
+                       headers={'Authorization': f'Bearer {token}'})
+
+def test_upload_image_generates_thumbnails(client, admin_token, sample_game, tmp_path):
+    """Test uploading an image stores it and writes resized thumbnails"""
+    response = _upload(client, sample_game.id, admin_token, _png())
+    assert response.status_code == 201
+    game = json.loads(response.data)['game']
+    assert game['image_url'].startswith('/images/')
+    assert set(game['thumbnails']) == {'thumb', 'medium'}
+
+    images.wait_for_thumbnails(timeout=10)
+    thumb = client.get(game['thumbnails']['thumb'])
+    assert thumb.status_code == 200
+    assert 'immutable' in thumb.headers['Cache-Control']
+    with Image.open(io.BytesIO(thumb.data)) as img:
+        assert max(img.size) <= 200
+
+def test_upload_same_image_is_content_addressed(client, admin_token, sample_game):
+    """Test identical uploads resolve to the same hashed filename"""
+    first = json.loads(_upload(client, sample_game.id, admin_token, _png()).data)
+    second = json.loads(_upload(client, sample_game.id, admin_token, _png()).data)
+    assert first['game']['image_url'] == second['game']['image_url']
+
+def test_upload_rejects_non_image(client, admin_token, sample_game):
+    """Test uploading a file that is not an image"""
+    response = _upload(client, sample_game.id, admin_token, b'not an image', 'cover.png')
+    assert response.status_code == 400
+
+def test_upload_size_limits(app, client, admin_token, sample_game):
+    """Test oversized uploads are refused without being read into memory"""
+    app.config['IMAGE_MAX_BYTES'] = 1000
+    response = _upload(client, sample_game.id, admin_token, _png())
+    assert response.status_code == 400
+    assert 'exceeds' in json.loads(response.data)['error']
+
+    app.config['MAX_CONTENT_LENGTH'] = 2000
+    response = _upload(client, sample_game.id, admin_token, b'\0' * 4000)
+    assert response.status_code == 413
+    assert db.session.get(Game, sample_game.id).image_url is None
+
+def test_upload_pixel_limit(app, client, admin_token, sample_game, tmp_path):
+    """Test that images with too many pixels are refused before being stored"""
+    app.config['IMAGE_MAX_PIXELS'] = 1000
+    response = _upload(client, sample_game.id, admin_token, _png((100, 20)))
+    assert response.status_code == 400
+    assert 'pixels' in json.loads(response.data)['error']
+    assert list(tmp_path.iterdir()) == []
+    assert db.session.get(Game, sample_game.id).image_url is None
+
+def test_upload_without_pillow_is_rejected(client, admin_token, sample_game, monkeypatch):
+    """Test that the file extension alone is never trusted"""
+    monkeypatch.setitem(__import__('sys').modules, 'PIL', None)
+    response = _upload(client, sample_game.id, admin_token, b'not an image', 'cover.png')
+    assert response.status_code == 400
+
+def test_upload_requires_admin(client, sample_game):
+    """Test uploading an image without authentication"""
+    response = client.post(f'/games/{sample_game.id}/image')
+    assert response.status_code == 401
+
+def test_get_image_supports_range_requests(client, admin_token, sample_game):
+    """Test stored images are served with byte range support"""
+    game = json.loads(_upload(client, sample_game.id, admin_token, _png()).data)['game']
+    response = client.get(game['image_url'], headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert len(response.data) == 10
+
+def test_get_image_invalid_name(client):
+    """Test serving a filename outside the hashed naming scheme"""
+    assert client.get('/images/..%2Fgames.db').status_code == 404
+    assert client.get('/images/0123456789abcdef.png').status_code == 404
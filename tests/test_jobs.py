@@ -0,0 +1,197 @@
+import os
+import json
+import time
+from datetime import timedelta
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Job, User
+from services.jobs import task, _now
+
+calls = []
+
+@task('test.record')
+def record(value):
+    calls.append(value)
+
+@task('test.flaky')
+def flaky(fail_times):
+    calls.append('attempt')
+    if calls.count('attempt') <= fail_times:
+        raise RuntimeError('transient failure')
+
+@pytest.fixture
+def config(tmp_path):
+    return type('JobsConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'jobs.db'}",
+        'JOB_RETRY_BACKOFF': 0,
+        'JOB_POLL_INTERVAL': 0.05,
+    })
+
+@pytest.fixture
+def app(config):
+    calls.clear()
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        app.extensions['job_queue'].stop()
+        db.session.remove()
+
+@pytest.fixture
+def queue(app):
+    return app.extensions['job_queue']
+
+def test_enqueue_and_run(queue):
+    """Test that an enqueued job is persisted and executed"""
+    job = queue.enqueue('test.record', {'value': 42})
+    assert job.status == 'queued'
+
+    assert queue.run_pending() == 1
+    assert calls == [42]
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == 'done'
+
+def test_retry_with_backoff(queue):
+    """Test that failing jobs are retried until they succeed"""
+    queue.enqueue('test.flaky', {'fail_times': 2}, max_attempts=3)
+    queue.run_pending()
+
+    job = Job.query.one()
+    assert job.status == 'done'
+    assert job.attempts == 3
+
+def test_permanent_failure(queue):
+    """Test that a job exceeding max attempts is marked failed"""
+    queue.backoff = 60
+    queue.enqueue('test.flaky', {'fail_times': 5}, max_attempts=2)
+    queue.run_pending()
+
+    job = Job.query.one()
+    assert job.status == 'queued'
+    assert 'transient failure' in job.last_error
+
+    job.run_at = job.created_at
+    db.session.commit()
+    queue.run_pending()
+    db.session.expire_all()
+    assert Job.query.one().status == 'failed'
+
+def test_unknown_job(queue):
+    """Test enqueuing a job without a handler"""
+    with pytest.raises(ValueError):
+        queue.enqueue('test.missing')
+
+def test_jobs_survive_restart(config, queue):
+    """Test that queued and interrupted jobs run after a restart"""
+    queue.enqueue('test.record', {'value': 'queued'})
+    interrupted = queue.enqueue('test.record', {'value': 'interrupted'})
+    interrupted.status = 'running'
+    interrupted.started_at = interrupted.created_at
+    db.session.commit()
+
+    restarted = create_app(type('Restarted', (config,), {'JOB_TIMEOUT': 0}))
+    restarted_queue = restarted.extensions['job_queue']
+    assert restarted_queue.requeue_stale() == 1
+    with restarted.app_context():
+        assert restarted_queue.run_pending() == 2
+    assert sorted(calls) == ['interrupted', 'queued']
+
+def test_running_worker_requeues_stale_jobs(queue):
+    """Test that a live worker picks up jobs abandoned by a crashed one"""
+    queue.timeout = 0.2
+    queue.start()
+    time.sleep(0.1)
+
+    # Claimed by another worker that then died
+    job = Job(name='test.record', payload={'value': 'orphan'}, max_attempts=3,
+              run_at=_now(), status='running', attempts=1,
+              started_at=_now() - timedelta(seconds=60))
+    db.session.add(job)
+    db.session.commit()
+
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline:
+        time.sleep(0.05)
+    assert calls == ['orphan']
+
+def test_wait_is_measured_from_due_time(queue):
+    """Test that a delayed job's scheduled delay does not count as queue wait"""
+    job = queue.enqueue('test.record', {'value': 'nightly'}, delay=3600)
+    job.created_at = job.created_at - timedelta(days=1)
+    job.run_at = _now()
+    db.session.commit()
+    queue.run_pending()
+    wait, _ = queue._latencies[-1]
+    assert 0 <= wait < 60
+
+def test_in_process_worker_threads(queue):
+    """Test that the threaded worker drains the queue"""
+    queue.start()
+    for value in range(5):
+        queue.enqueue('test.record', {'value': value})
+
+    deadline = time.time() + 5
+    while len(calls) < 5 and time.time() < deadline:
+        time.sleep(0.05)
+    assert sorted(calls) == [0, 1, 2, 3, 4]
+
+def test_worker_cli_burst(app, queue):
+    """Test running the worker command in burst mode"""
+    queue.enqueue('test.record', {'value': 'cli'})
+    result = app.test_cli_runner().invoke(args=['worker', '--burst'])
+    assert 'Ran 1 jobs' in result.output
+    assert calls == ['cli']
+
+def test_stats_endpoint(app, queue):
+    """Test that queue depth and latency are exposed to admins"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    login = client.post('/auth/login',
+                        data=json.dumps({"email": "admin@example.com", "password": "admin123"}),
+                        content_type='application/json')
+    token = json.loads(login.data)['access_token']
+
+    queue.enqueue('test.record', {'value': 1})
+    queue.enqueue('test.record', {'value': 2}, delay=3600)
+    queue.run_pending()
+
+    response = client.get('/admin/jobs/stats', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    stats = json.loads(response.data)
+    assert stats['depth'] == 1
+    assert stats['done'] == 1
+    assert stats['run_p50'] is not None
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_in_process_worker_starts_per_process_after_fork(config):
+    """Test that a worker forked from a preloaded app runs jobs itself"""
+    app = create_app(type('InProcess', (config,), {'JOBS_IN_PROCESS': True}))
+    queue = app.extensions['job_queue']
+    with app.app_context():
+        db.create_all()
+        db.engine.dispose()
+    # Building the app (as a preloading master does) starts no threads
+    assert queue._thread is None
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            with app.app_context():
+                job_id = queue.enqueue('test.record', {'value': 'forked'}).id
+                deadline = time.time() + 5
+                while time.time() < deadline:
+                    db.session.expire_all()
+                    if db.session.get(Job, job_id).status == 'done':
+                        status = 0
+                        break
+                    time.sleep(0.05)
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert queue._thread is None
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone, timedelta
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, Cart, CartItem, Job, GameStats
+from services.maintenance import purge_stale_carts, purge_orphaned_items, run_maintenance
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _days_ago(days):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+@pytest.fixture
+def carts(app):
+    """Create a fresh cart, a stale cart, and a stale cart with a recent item"""
+    users = [User(email=f"user{i}@example.com", username=f"user{i}", password_hash='x') for i in range(3)]
+    game = Game(title="Test Game", price=9.99, stock=5)
+    db.session.add_all(users + [game])
+    db.session.commit()
+
+    fresh = Cart(user_id=users[0].id)
+    stale = Cart(user_id=users[1].id, updated_at=_days_ago(60))
+    active = Cart(user_id=users[2].id, updated_at=_days_ago(60))
+    db.session.add_all([fresh, stale, active])
+    db.session.commit()
+    db.session.add_all([
+        CartItem(cart_id=stale.id, game_id=game.id, quantity=1, updated_at=_days_ago(60)),
+        CartItem(cart_id=active.id, game_id=game.id, quantity=1),
+    ])
+    db.session.commit()
+    return {'fresh': fresh.id, 'stale': stale.id, 'active': active.id, 'game': game.id}
+
+def test_purge_stale_carts(carts):
+    """Test that only carts idle past the cutoff are deleted with their items"""
+    assert purge_stale_carts(older_than_days=30, batch_size=1) == 1
+    remaining = {cart.id for cart in Cart.query.all()}
+    assert remaining == {carts['fresh'], carts['active']}
+    assert CartItem.query.filter_by(cart_id=carts['stale']).count() == 0
+
+def test_purge_in_batches(app):
+    """Test that purging more rows than the batch size deletes all of them"""
+    for i in range(7):
+        db.session.add(Cart(user_id=i + 1, updated_at=_days_ago(90)))
+    db.session.commit()
+    assert purge_stale_carts(older_than_days=30, batch_size=3) == 7
+    assert Cart.query.count() == 0
+
+def test_purge_orphaned_items(carts):
+    """Test that items pointing at deleted games are removed"""
+    db.session.execute(db.delete(Game).where(Game.id == carts['game']))
+    db.session.commit()
+    assert purge_orphaned_items(batch_size=10) == 2
+    assert CartItem.query.count() == 0
+
+def test_run_maintenance_reports(carts):
+    """Test the full run reports rows and timings for each step"""
+    report = run_maintenance(cart_days=30, batch_size=10)
+    assert report['stale_carts']['rows'] == 1
+    assert report['orphaned_items']['rows'] == 0
+    assert report['optimize']['rows'] == 2
+    assert all('seconds' in step for step in report.values())
+
+def test_maintenance_cli(app, carts):
+    """Test running maintenance from the command line"""
+    result = app.test_cli_runner().invoke(args=['maintenance', '--cart-days', '30', '--no-vacuum'])
+    assert result.exit_code == 0
+    assert 'stale_carts: 1 rows' in result.output
+
+def test_schedule_is_deduplicated(app):
+    """Test that scheduling twice queues a single maintenance job"""
+    runner = app.test_cli_runner()
+    assert 'scheduled' in runner.invoke(args=['maintenance', 'schedule']).output
+    assert 'already' in runner.invoke(args=['maintenance', 'schedule']).output
+    assert Job.query.filter_by(name='maintenance.run').count() == 1
+
+def test_purges_report_counter_deltas(app, carts):
+    """Test that purged items are subtracted from game_stats, not rebuilt"""
+    counters = app.extensions['game_counters']
+    counters.increment(carts['game'], carts_containing=2, units_in_carts=2)
+    counters.flush()
+
+    report = run_maintenance(cart_days=30, batch_size=10)
+    assert report['game_stats']['rows'] == 1
+    stats = db.session.get(GameStats, carts['game'])
+    assert (stats.carts_containing, stats.units_in_carts) == (1, 1)
+
+def test_maintenance_keeps_pending_deltas(app, carts):
+    """Test that deltas not yet flushed by the web process are not counted twice"""
+    counters = app.extensions['game_counters']
+    game = Game(title="New Game", price=1.0, stock=5)
+    db.session.add(game)
+    db.session.commit()
+    game_id = game.id
+
+    # A cart add whose counter delta is still pending in a web process
+    db.session.add(CartItem(cart_id=carts['fresh'], game_id=game_id, quantity=2))
+    db.session.commit()
+    run_maintenance(cart_days=30, batch_size=10)
+    counters.increment(game_id, carts_containing=1, units_in_carts=2)
+    counters.flush()
+    stats = db.session.get(GameStats, game_id)
+    assert (stats.carts_containing, stats.units_in_carts) == (1, 2)
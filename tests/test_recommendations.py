@@ -0,0 +1,132 @@
+import threading
+import time
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, Cart, CartItem
+
+pytest.importorskip('scipy')
+
+from services.recommendations import cooccurrence, top_k
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def related(app):
+    return app.extensions['related_games']
+
+def _carts(contents, first_user=1):
+    """Create one cart per list of game ids"""
+    for user_id, game_ids in enumerate(contents, start=first_user):
+        cart = Cart(user_id=user_id)
+        db.session.add(cart)
+        db.session.flush()
+        for game_id in game_ids:
+            db.session.add(CartItem(cart_id=cart.id, game_id=game_id, quantity=1))
+    db.session.commit()
+
+@pytest.fixture
+def games(app):
+    for i in range(1, 6):
+        db.session.add(Game(id=i, title=f"Game {i}", price=9.99, stock=5))
+    db.session.commit()
+
+def test_cooccurrence_counts_each_cart_once():
+    """Test pair counts, with duplicate rows in a cart counted once"""
+    games, counts = cooccurrence([1, 1, 1, 2, 2, 3], [10, 20, 20, 10, 20, 30])
+    index = top_k(games, counts, k=5)
+    assert index[10] == [(20, 2)]
+    assert index[20] == [(10, 2)]
+    assert index[30] == []
+
+def test_top_k_limits_and_orders():
+    """Test that only the k strongest neighbours are kept, strongest first"""
+    carts = [1, 1, 2, 2, 3, 3, 4, 4, 4]
+    items = [1, 2, 1, 2, 1, 3, 1, 4, 2]
+    games, counts = cooccurrence(carts, items)
+    assert top_k(games, counts, k=2)[1] == [(2, 3), (3, 1)]
+
+def test_related_endpoint(client, games):
+    """Test the related games endpoint returns details ranked by score"""
+    _carts([[1, 2], [1, 2, 3], [1, 3], [1, 2], [4]])
+    response = client.get('/games/1/related')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [game['id'] for game in data['related']] == [2, 3]
+    assert [game['score'] for game in data['related']] == [3, 2]
+
+    data = json.loads(client.get('/games/1/related?limit=1').data)
+    assert len(data['related']) == 1
+    assert json.loads(client.get('/games/5/related').data)['related'] == []
+
+def test_incremental_refresh_matches_full_build(related, games):
+    """Test that folding in new cart items gives the same index as a rebuild"""
+    _carts([[1, 2], [2, 3]])
+    related.build()
+
+    # New items in an existing cart and a brand new cart with a new game
+    cart = Cart.query.filter_by(user_id=1).first()
+    db.session.add(CartItem(cart_id=cart.id, game_id=3, quantity=1))
+    db.session.commit()
+    _carts([[3, 5]], first_user=3)
+    assert related.refresh() > 0
+    incremental = dict(related._index)
+
+    related.build()
+    assert incremental == related._index
+    assert related.related(3) == [(2, 2), (1, 1), (5, 1)]
+    assert related.refresh() == 0
+
+def test_concurrent_first_lookups_build_once(app, related, games, monkeypatch):
+    """Test that simultaneous first requests share a single build"""
+    _carts([[1, 2]])
+    builds = []
+    build = related.build
+    monkeypatch.setattr(related, 'build', lambda: builds.append(1) or build())
+
+    def lookup():
+        with app.app_context():
+            related.related(1)
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
+    assert related.related(1) == [(2, 1)]
+
+def test_background_build_does_not_block_requests(tmp_path):
+    """Test that with a refresher the first lookup returns at once and the index follows"""
+    app = create_app(type('RefreshConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'related.db'}",
+        'RELATED_REFRESH_INTERVAL': 60,
+    }))
+    related = app.extensions['related_games']
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Game(id=1, title="Game 1", price=9.99, stock=5),
+                            Game(id=2, title="Game 2", price=9.99, stock=5)])
+        _carts([[1, 2]])
+        try:
+            assert related._thread is None
+            related.related(1)
+            deadline = time.time() + 5
+            while related._built_at is None and time.time() < deadline:
+                time.sleep(0.05)
+            assert related.related(1) == [(2, 1)]
+        finally:
+            related.close()
+            db.session.remove()
@@ -0,0 +1,92 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User
+from services.db_routing import REPLICA_BIND_KEY
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('ReplicaConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {REPLICA_BIND_KEY: f"sqlite:///{tmp_path / 'replica.db'}"},
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND_KEY])
+        yield app
+        db.session.remove()
+    # init_app registered a (table-less) metadata for the bind on the shared
+    # `db`; drop it so apps built by other tests without the bind still work
+    db.metadatas.pop(REPLICA_BIND_KEY, None)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def replicate():
+    """Simulate the replica catching up by copying every table from the primary"""
+    primary, replica = db.engines[None], db.engines[REPLICA_BIND_KEY]
+    with primary.connect() as source, replica.begin() as target:
+        for table in reversed(db.metadata.sorted_tables):
+            target.execute(table.delete())
+        for table in db.metadata.sorted_tables:
+            rows = [dict(row._mapping) for row in source.execute(table.select())]
+            if rows:
+                target.execute(table.insert(), rows)
+
+def _add_game(title):
+    game = Game(title=title, price=9.99, stock=5)
+    db.session.add(game)
+    db.session.commit()
+    return game.id
+
+def test_list_reads_from_replica(client):
+    """Test that catalog listing is served by the lagging replica"""
+    _add_game("Fresh Game")
+
+    # Replication lag: the replica has not seen the new game yet
+    data = json.loads(client.get('/games').data)
+    assert data['total'] == 0
+
+    replicate()
+    data = json.loads(client.get('/games').data)
+    assert data['total'] == 1
+    assert data['games'][0]['title'] == "Fresh Game"
+
+def test_detail_falls_back_to_primary(client):
+    """Test that a game missing on the replica is read from the primary"""
+    game_id = _add_game("Fresh Game")
+    response = client.get(f'/games/{game_id}')
+    assert response.status_code == 200
+    assert client.get('/games/999').status_code == 404
+
+def test_writes_go_to_primary(app, client):
+    """Test that registration writes land on the primary only"""
+    response = client.post('/auth/register',
+                           data=json.dumps({
+                               "email": "test@example.com",
+                               "username": "testuser",
+                               "password": "password123"
+                           }),
+                           content_type='application/json')
+    assert response.status_code == 201
+
+    with db.engines[REPLICA_BIND_KEY].connect() as replica:
+        assert replica.execute(User.__table__.select()).first() is None
+    with db.engines[None].connect() as primary:
+        assert primary.execute(User.__table__.select()).first() is not None
+
+def test_me_reads_own_write_before_replication(client):
+    """Test that /auth/me sees a just-registered user despite replica lag"""
+    data = {"email": "test@example.com", "username": "testuser", "password": "password123"}
+    client.post('/auth/register', data=json.dumps(data), content_type='application/json')
+    login = client.post('/auth/login',
+                        data=json.dumps({"email": data['email'], "password": data['password']}),
+                        content_type='application/json')
+    token = json.loads(login.data)['access_token']
+
+    response = client.get('/auth/me', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert json.loads(response.data)['email'] == data['email']
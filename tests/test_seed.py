@@ -0,0 +1,66 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, Cart, CartItem
+from services.seed import seed_database
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _contents():
+    games = db.session.execute(db.select(Game.id, Game.title, Game.price, Game.stock).order_by(Game.id)).all()
+    items = db.session.execute(
+        db.select(Cart.user_id, CartItem.game_id, CartItem.quantity)
+        .join(CartItem, CartItem.cart_id == Cart.id).order_by(CartItem.id)
+    ).all()
+    return games, items
+
+def test_seed_counts_and_report(app):
+    """Test that the requested rows are created and reported"""
+    report = seed_database(games=50, users=20, carts=10, items_per_cart=3, batch_size=7)
+    assert Game.query.count() == report['games']['rows'] == 50
+    assert User.query.count() == report['users']['rows'] == 20
+    assert Cart.query.count() == report['carts']['rows'] == 10
+    assert CartItem.query.count() == report['cart_items']['rows'] > 0
+    assert all('rows_per_second' in result for result in report.values())
+
+def test_seed_is_deterministic(app):
+    """Test that the same seed produces the same data"""
+    seed_database(games=30, users=10, carts=5, seed=7)
+    first = _contents()
+    db.drop_all()
+    db.create_all()
+    seed_database(games=30, users=10, carts=5, seed=7)
+    assert _contents() == first
+
+    db.drop_all()
+    db.create_all()
+    seed_database(games=30, users=10, carts=5, seed=8)
+    assert _contents() != first
+
+def test_seed_appends_and_users_can_log_in(app):
+    """Test that seeding twice appends rows and seeded users can log in"""
+    seed_database(games=5, users=3, carts=2, password='loadtest123')
+    seed_database(games=5, users=3, carts=2, password='loadtest123')
+    assert Game.query.count() == 10
+    assert User.query.count() == 6
+
+    user = User.query.order_by(User.id.desc()).first()
+    response = app.test_client().post('/auth/login',
+                                      data=json.dumps({"email": user.email, "password": "loadtest123"}),
+                                      content_type='application/json')
+    assert response.status_code == 200
+
+def test_seed_command(app):
+    """Test the flask seed command"""
+    result = app.test_cli_runner().invoke(args=['seed', '--games', '10', '--users', '5', '--carts', '3'])
+    assert result.exit_code == 0
+    assert 'games: 10 rows' in result.output
+    assert 'rows/s' in result.output
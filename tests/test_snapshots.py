@@ -0,0 +1,127 @@
+import json
+import os
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, Job
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('SnapshotConfig', (TestingConfig,), {
+        'SNAPSHOTS_ENABLED': True,
+        'SNAPSHOT_DIR': str(tmp_path / 'snapshots'),
+        'SNAPSHOT_PAGES': 2,
+        'SNAPSHOT_PAGE_SIZE': 10,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def snapshots(app):
+    return app.extensions['snapshots']
+
+@pytest.fixture
+def admin_token(client):
+    """Create an admin user and return their token"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "admin@example.com",
+                              "password": "admin123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def games():
+    for i in range(25):
+        db.session.add(Game(title=f"Game {i}", price=9.99, stock=5))
+    db.session.commit()
+
+def test_snapshot_matches_live_response(client, snapshots, games):
+    """Test that snapshot pages are identical to database-rendered pages"""
+    live_page = client.get('/games?page=2').data
+    live_game = client.get('/games/3').data
+
+    stats = snapshots.build()
+    assert stats['pages'] == 2
+    assert stats['games'] == 25
+    assert client.get('/games?page=2').data == live_page
+    assert client.get('/games/3').data == live_game
+
+def test_snapshot_served_without_database(client, snapshots, games):
+    """Test that snapshot pages are served even when the tables are gone"""
+    snapshots.build()
+    db.drop_all()
+
+    response = client.get('/games?page=1')
+    assert response.status_code == 200
+    assert json.loads(response.data)['total'] == 25
+    assert client.get('/games/7').status_code == 200
+    db.create_all()
+
+def test_uncovered_pages_fall_through(client, snapshots, games):
+    """Test that pages outside the snapshot are read from the database"""
+    snapshots.build()
+    assert snapshots.page(3, 10) is None
+    assert snapshots.page(1, 20) is None
+    assert len(json.loads(client.get('/games?page=1&limit=20').data)['games']) == 20
+
+def test_write_invalidates_and_schedules_rebuild(app, client, snapshots, games, admin_token):
+    """Test that catalog writes stop serving stale data and rebuild via the job queue"""
+    snapshots.build()
+    response = client.put('/games/1',
+                          data=json.dumps({'title': 'Renamed'}),
+                          content_type='application/json',
+                          headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert snapshots.current_version() is None
+    assert json.loads(client.get('/games/1').data)['title'] == 'Renamed'
+
+    client.delete('/games/2', headers={'Authorization': f'Bearer {admin_token}'})
+    assert Job.query.filter_by(name='snapshots.rebuild').count() == 1
+
+    app.extensions['job_queue'].run_pending()
+    assert snapshots.current_version() is not None
+    assert json.loads(snapshots.game(1))['title'] == 'Renamed'
+    assert snapshots.game(2) is None
+
+def test_build_superseded_by_write(snapshots, games, monkeypatch):
+    """Test that a build overlapping a write is discarded instead of published"""
+    # Simulate a catalog write landing while the games are being rendered
+    original_to_dict = Game.to_dict
+    def to_dict_with_concurrent_write(game):
+        snapshots.invalidate()
+        return original_to_dict(game)
+    monkeypatch.setattr(Game, 'to_dict', to_dict_with_concurrent_write)
+
+    assert snapshots.build() is None
+    assert snapshots.current_version() is None
+
+def test_old_versions_pruned(snapshots, games):
+    """Test that only recent versions are kept on disk"""
+    for _ in range(4):
+        snapshots.build()
+    versions = [name for name in os.listdir(snapshots.directory)
+                if os.path.isdir(os.path.join(snapshots.directory, name))
+                and not os.path.islink(os.path.join(snapshots.directory, name))]
+    assert len(versions) == 2
+    assert snapshots.current_version() in versions
+
+def test_build_cli(app, games):
+    """Test building a snapshot from the command line"""
+    result = app.test_cli_runner().invoke(args=['snapshots', 'build'])
+    assert 'Published' in result.output
+    assert '25 games' in result.output
@@ -0,0 +1,130 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User, StockShard
+from services.stock import shard_stock, unshard_stock, decrement_stock, increment_stock
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def game(app):
+    game = Game(title="Hot Game", price=69.99, stock=100)
+    db.session.add(game)
+    db.session.commit()
+    return game.id
+
+@pytest.fixture
+def admin_token(client):
+    """Create an admin user and return their token"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "admin@example.com",
+                              "password": "admin123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+def _shards(game_id):
+    return [shard.count for shard in
+            StockShard.query.filter_by(game_id=game_id).order_by(StockShard.bucket)]
+
+def test_single_row_decrement(game):
+    """Test the conditional decrement of an unsharded game"""
+    assert decrement_stock(game, 60)
+    assert not decrement_stock(game, 41)
+    db.session.commit()
+    assert db.session.get(Game, game).stock == 40
+    increment_stock(game, 5)
+    db.session.commit()
+    assert db.session.get(Game, game).stock == 45
+
+def test_sharding_preserves_total(game):
+    """Test that sharded stock is spread evenly and read back as Game.stock"""
+    assert shard_stock(game, 8) == 100
+    db.session.commit()
+    assert _shards(game) == [13, 13, 13, 13, 12, 12, 12, 12]
+    assert db.session.get(Game, game).stock == 100
+    assert Game.query.filter(Game.stock == 100).count() == 1
+    assert db.session.get(Game, game).to_dict()['stock'] == 100
+
+def test_sharded_decrements_drain_exactly(game):
+    """Test that random shard decrements and rebalancing sell every unit once"""
+    shard_stock(game, 4)
+    db.session.commit()
+    sold = 0
+    while decrement_stock(game, 3):
+        sold += 3
+        db.session.commit()
+    assert sold == 99
+    assert db.session.get(Game, game).stock == 1
+    assert min(_shards(game)) >= 0
+
+    # Larger than any single shard: served by rebalancing
+    increment_stock(game, 20)
+    db.session.commit()
+    assert decrement_stock(game, 21)
+    db.session.commit()
+    assert db.session.get(Game, game).stock == 0
+
+def test_setting_stock_on_sharded_game(client, admin_token, game):
+    """Test that an admin stock update is spread over the shards"""
+    shard_stock(game, 4)
+    db.session.commit()
+    response = client.put(f'/games/{game}', headers={'Authorization': f'Bearer {admin_token}'},
+                          data=json.dumps({"stock": 10}), content_type='application/json')
+    assert response.status_code == 200
+    assert json.loads(response.data)['game']['stock'] == 10
+    assert _shards(game) == [3, 3, 2, 2]
+
+def test_unshard_and_delete(game):
+    """Test folding shards back and deleting a sharded game"""
+    shard_stock(game, 4)
+    decrement_stock(game, 7)
+    db.session.commit()
+    assert unshard_stock(game) == 93
+    db.session.commit()
+    assert StockShard.query.count() == 0
+    assert db.session.get(Game, game).stock == 93
+
+    shard_stock(game, 2)
+    db.session.commit()
+    db.session.delete(db.session.get(Game, game))
+    db.session.commit()
+    assert StockShard.query.count() == 0
+
+def test_admin_stock_shard_endpoints(client, admin_token, game):
+    """Test enabling and disabling sharding through the admin API"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.put(f'/admin/games/{game}/stock-shards', headers=headers,
+                          data=json.dumps({"buckets": 5}), content_type='application/json')
+    assert response.status_code == 200
+    assert json.loads(response.data) == {'game_id': game, 'buckets': 5, 'stock': 100}
+    assert len(_shards(game)) == 5
+
+    response = client.put('/admin/games/999/stock-shards', headers=headers,
+                          data=json.dumps({"buckets": 5}), content_type='application/json')
+    assert response.status_code == 404
+    response = client.put(f'/admin/games/{game}/stock-shards', headers=headers,
+                          data=json.dumps({"buckets": 1}), content_type='application/json')
+    assert response.status_code == 400
+
+    response = client.delete(f'/admin/games/{game}/stock-shards', headers=headers)
+    assert json.loads(response.data)['stock'] == 100
+    assert _shards(game) == []
@@ -0,0 +1,105 @@
+import threading
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User
+from services.suggest import normalize
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_token(client):
+    """Create an admin user and return their token"""
+    admin = User(email="admin@example.com", username="adminuser", role="admin")
+    admin.set_password("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "admin@example.com",
+                              "password": "admin123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+@pytest.fixture
+def games():
+    for title in ["The Witcher 3: Wild Hunt", "Witness Protection", "Pokémon Red",
+                  "Portal 2", "Hollow Knight"]:
+        db.session.add(Game(title=title, price=9.99, stock=5))
+    db.session.commit()
+
+def _titles(client, prefix, **params):
+    response = client.get('/games/suggest', query_string={'prefix': prefix, **params})
+    assert response.status_code == 200
+    return [s['title'] for s in json.loads(response.data)['suggestions']]
+
+def test_normalize():
+    """Test that case, accents, punctuation and spacing are ignored"""
+    assert normalize("  Pokémon:  RED! ") == "pokemon red"
+
+def test_suggest_prefix_and_word_matches(client, games):
+    """Test that a prefix matches title starts and word starts"""
+    assert _titles(client, 'wit') == ["The Witcher 3: Wild Hunt", "Witness Protection"]
+    assert _titles(client, 'POKE') == ["Pokémon Red"]
+    assert _titles(client, 'po') == ["Pokémon Red", "Portal 2"]
+    assert _titles(client, 'po', limit=1) == ["Pokémon Red"]
+    assert _titles(client, 'knight') == ["Hollow Knight"]
+    assert _titles(client, 'zelda') == []
+    assert _titles(client, '') == []
+
+def test_suggest_follows_catalog_writes(client, admin_token, games):
+    """Test that created, renamed and deleted games are reflected immediately"""
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    assert _titles(client, 'celeste') == []
+
+    response = client.post('/games', headers=headers, content_type='application/json',
+                           data=json.dumps({"title": "Celeste", "price": 19.99, "stock": 3}))
+    game_id = json.loads(response.data)['game']['id']
+    assert _titles(client, 'celeste') == ["Celeste"]
+
+    client.put(f'/games/{game_id}', headers=headers, content_type='application/json',
+               data=json.dumps({"title": "Celeste Classic"}))
+    assert _titles(client, 'classic') == ["Celeste Classic"]
+
+    client.delete(f'/games/{game_id}', headers=headers)
+    assert _titles(client, 'celeste') == []
+    assert _titles(client, 'classic') == []
+
+def test_index_is_bounded(app, games):
+    """Test that titles beyond SUGGEST_MAX_KEYS are not indexed"""
+    index = app.extensions['title_index']
+    index.max_keys = 3
+    index.build()
+    assert len(index._keys) <= 3
+
+def test_concurrent_first_lookups_build_once(app, games, monkeypatch):
+    """Test that simultaneous first lookups share a single index build"""
+    index = app.extensions['title_index']
+    builds = []
+    build = index.build
+    monkeypatch.setattr(index, 'build', lambda: builds.append(1) or build())
+
+    def lookup():
+        with app.app_context():
+            index.suggest('wit')
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, Game, User
+from services.tracing import span
+
+@pytest.fixture
+def make_app(tmp_path):
+    apps = []
+
+    def make(**overrides):
+        config = type('TracingConfig', (TestingConfig,), {
+            'TRACING_ENABLED': True,
+            'TRACE_SAMPLE_RATE': 1.0,
+            'TRACE_SLOW_THRESHOLD': 60.0,
+            'TRACE_EXPORT_PATH': str(tmp_path / 'traces.jsonl'),
+            **overrides
+        })
+        app = create_app(config)
+        context = app.app_context()
+        context.push()
+        db.create_all()
+        apps.append(context)
+        return app
+
+    yield make
+    for context in apps:
+        db.session.remove()
+        db.drop_all()
+        context.pop()
+
+def _token(client):
+    user = User(email="user@example.com", username="testuser")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.add(Game(title="Test Game", price=59.99, stock=10))
+    db.session.commit()
+    response = client.post('/auth/login',
+                          data=json.dumps({"email": "user@example.com", "password": "password123"}),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+def _add(client, token, headers=None):
+    return client.post('/api/cart/add',
+                       headers={'Authorization': f'Bearer {token}', **(headers or {})},
+                       data=json.dumps({"game_id": 1, "quantity": 1}),
+                       content_type='application/json')
+
+def _exported(app):
+    if not os.path.exists(app.config['TRACE_EXPORT_PATH']):
+        return []
+    with open(app.config['TRACE_EXPORT_PATH']) as exported:
+        return [json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans'] for line in exported]
+
+def test_add_to_cart_phases(make_app):
+    """Test that the cart add phases are exported as one nested trace"""
+    app = make_app()
+    client = app.test_client()
+    token = _token(client)
+    assert _add(client, token).status_code == 200
+
+    spans = _exported(app)[-1]
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s['name'], []).append(s)
+    root = by_name['POST /api/cart/add'][0]
+    assert 'parentSpanId' not in root
+    assert {'key': 'http.response.status_code', 'value': {'intValue': '200'}} in root['attributes']
+    assert len({s['traceId'] for s in spans}) == 1
+
+    for name in ('jwt.verify', 'validate', 'cart.stock_check', 'cart.to_dict'):
+        assert by_name[name][0]['parentSpanId'] == root['spanId']
+    assert by_name['db.commit']
+
+    stock_check = by_name['cart.stock_check'][0]
+    queries = [s for s in by_name['db.query'] if s.get('parentSpanId') == stock_check['spanId']]
+    assert len(queries) == 1
+    statement = {a['key']: a['value'] for a in queries[0]['attributes']}['db.statement']['stringValue']
+    assert statement.startswith('SELECT') and 'FROM games' in statement
+
+def test_head_sampling(make_app):
+    """Test that unsampled requests are not exported and traceparent is honoured"""
+    app = make_app(TRACE_SAMPLE_RATE=0.0)
+    client = app.test_client()
+    token = _token(client)
+    _add(client, token)
+    assert _exported(app) == []
+
+    trace_id, parent_id = 'a' * 32, 'b' * 16
+    _add(client, token, {'traceparent': f'00-{trace_id}-{parent_id}-01'})
+    _add(client, token, {'traceparent': f'00-{"c" * 32}-{parent_id}-00'})
+    traces = _exported(app)
+    assert len(traces) == 1
+    root = [s for s in traces[0] if s['kind'] == 2][0]
+    assert root['traceId'] == trace_id
+    assert root['parentSpanId'] == parent_id
+
+def test_slow_request_log(make_app, caplog):
+    """Test that slow requests log their span tree even when not sampled"""
+    app = make_app(TRACE_SAMPLE_RATE=0.0, TRACE_SLOW_THRESHOLD=0.0)
+    client = app.test_client()
+    token = _token(client)
+    with caplog.at_level(logging.WARNING, logger='services.tracing'):
+        _add(client, token)
+
+    message = [r.getMessage() for r in caplog.records if 'Slow request' in r.getMessage()][-1]
+    assert message.startswith('Slow request POST /api/cart/add')
+    assert '\n  jwt.verify' in message
+    assert '\n    db.query' in message
+
+def test_span_is_noop_outside_requests(make_app):
+    """Test that spans outside a traced request record nothing"""
+    make_app()
+    with span('background') as s:
+        assert s is None
@@ -0,0 +1,68 @@
+import json
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db, User, GameCreate
+from routes.validation import type_adapter
+
+@pytest.fixture
+def client():
+    app = create_app(TestingConfig)
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.session.remove()
+            db.drop_all()
+
+@pytest.fixture
+def user_token(client):
+    """Create a regular user and return their token"""
+    user = User(email="user@example.com", username="regularuser", role="user")
+    user.set_password("user123")
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post('/auth/login',
+                          data=json.dumps({
+                              "email": "user@example.com",
+                              "password": "user123"
+                          }),
+                          content_type='application/json')
+    return json.loads(response.data)['access_token']
+
+def test_malformed_json(client):
+    """Test that a body that is not JSON gets a 400 with details"""
+    response = client.post('/auth/register', data='{"email": ', content_type='application/json')
+    assert response.status_code == 400
+    data = json.loads(response.data)
+    assert data['error'] == 'Invalid request body'
+    assert data['details'][0]['type'] == 'json_invalid'
+
+def test_missing_fields(client):
+    """Test that each missing field is reported"""
+    response = client.post('/auth/register',
+                           data=json.dumps({"email": "test@example.com"}),
+                           content_type='application/json')
+    assert response.status_code == 400
+    missing = {tuple(error['loc']) for error in json.loads(response.data)['details']}
+    assert missing == {('username',), ('password',)}
+
+def test_empty_body(client):
+    """Test that an empty body is validated like an empty object"""
+    response = client.post('/auth/login')
+    assert response.status_code == 400
+    assert len(json.loads(response.data)['details']) == 2
+
+def test_update_cart_requires_game_id(client, user_token):
+    """Test that game_id is validated by the model for cart updates"""
+    response = client.put('/api/cart/update',
+                          data=json.dumps({"quantity": 2}),
+                          content_type='application/json',
+                          headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 400
+    assert json.loads(response.data)['details'][0]['loc'] == ['game_id']
+
+def test_type_adapter_is_cached():
+    """Test that adapters are built once per model"""
+    assert type_adapter(GameCreate) is type_adapter(GameCreate)